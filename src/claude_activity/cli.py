@@ -19,6 +19,7 @@ from .config import get_config
 from .db import Database
 from .queries import QueryHelper, get_week_range, get_month_range
 from .summarizer import Summarizer
+from .timestamps import format_local_time_many
 from .watcher import (
     Watcher,
     read_pid_file,
@@ -273,9 +274,8 @@ def sessions(repo: Optional[str], since: Optional[str], limit: int):
             console.print("[red]Invalid date format. Use YYYY-MM-DD[/red]")
             return
 
-    sessions_list = helper.get_recent_sessions(project_id, since_dt, limit)
-    # Filter out sessions with no actual messages (only system messages)
-    sessions_list = [s for s in sessions_list if s.get('user_count', 0) > 0 or s.get('assistant_count', 0) > 0]
+    # Leave out sessions with no actual messages (only system messages)
+    sessions_list = helper.get_recent_sessions(project_id, since_dt, limit, nonempty=True)
 
     if not sessions_list:
         console.print("[yellow]No sessions found[/yellow]")
@@ -288,15 +288,14 @@ def sessions(repo: Optional[str], since: Optional[str], limit: int):
     table.add_column("Messages")
     table.add_column("Branch")
 
-    from .queries import utc_to_local
-    for s in sessions_list:
+    # Convert start times from UTC to local time for display, in one batch
+    started_times = format_local_time_many(
+        [s.get('started_at') for s in sessions_list], "%Y-%m-%d %H:%M"
+    )
+    for s, started in zip(sessions_list, started_times):
         # Show first 12 chars - enough to uniquely identify and tab-complete
         session_id = s['session_id'][:12]
         project = s.get('project_name') or 'Unknown'
-        started = s.get('started_at', '')
-        if isinstance(started, datetime):
-            # Convert from UTC to local time for display
-            started = utc_to_local(started).strftime("%Y-%m-%d %H:%M")
         messages = f"{s.get('user_count', 0)}u / {s.get('assistant_count', 0)}a"
         branch = s.get('git_branch') or '-'
 
@@ -314,16 +313,10 @@ def session(session_id: str):
 
     # Try to find session by prefix match
     db = Database()
-    with db.connection() as conn:
-        cursor = conn.execute(
-            "SELECT session_id FROM sessions WHERE session_id LIKE ?",
-            (f"{session_id}%",)
-        )
-        row = cursor.fetchone()
-        if row:
-            session_id = row['session_id']
+    session_id = db.find_session_id(session_id) or session_id
 
-    detail = helper.get_session_detail(session_id)
+    # Empty and tool-only messages are left out of the conversation
+    detail = helper.get_session_detail(session_id, exclude_tools=True)
 
     if not detail:
         console.print(f"[red]Session not found: {session_id}[/red]")
@@ -348,18 +341,8 @@ def session(session_id: str):
     if messages:
         console.print("\n[bold]Conversation:[/bold]\n")
         for msg in messages:
-            role = msg.get('role')
-            if not role:
-                continue
-
-            content = msg.get('content') or ''
-
-            # Skip empty messages and tool-only messages
-            content_stripped = content.strip()
-            if not content_stripped:
-                continue
-            if content_stripped.startswith('[Tool:') or content_stripped == '[Tool Result]':
-                continue
+            role = msg['role']
+            content = msg['content']
 
             timestamp = msg.get('timestamp', '')
             if isinstance(timestamp, datetime):
@@ -381,7 +364,9 @@ def session(session_id: str):
 @cli.command()
 @click.option('--force', '-f', is_flag=True, help='Regenerate existing summaries')
 @click.option('--repo', '-r', help='Filter by repository name')
-def summarize(force: bool, repo: Optional[str]):
+@click.option('--parallel', '-p', default=1, show_default=True,
+              help='Number of daily summaries to request concurrently')
+def summarize(force: bool, repo: Optional[str], parallel: int):
     """Generate summaries for unsummarized periods."""
     config = get_config()
     helper = QueryHelper(config)
@@ -397,7 +382,7 @@ def summarize(force: bool, repo: Optional[str]):
 
     try:
         summarizer = Summarizer(config)
-        results = summarizer.summarize_unsummarized(project_id, force)
+        results = summarizer.summarize_unsummarized(project_id, force, concurrency=parallel)
 
         console.print(f"\n[green]Generated summaries:[/green]")
         console.print(f"  Daily:  {results['daily']}")
@@ -424,17 +409,11 @@ def context(session_id: str, copy: bool, output: Optional[str]):
     db = Database(config)
 
     # Find session by prefix
-    with db.connection() as conn:
-        cursor = conn.execute(
-            "SELECT session_id FROM sessions WHERE session_id LIKE ?",
-            (f"{session_id}%",)
-        )
-        row = cursor.fetchone()
-        if row:
-            session_id = row['session_id']
-        else:
-            console.print(f"[red]Session not found: {session_id}[/red]")
-            return
+    full_session_id = db.find_session_id(session_id)
+    if not full_session_id:
+        console.print(f"[red]Session not found: {session_id}[/red]")
+        return
+    session_id = full_session_id
 
     console.print(f"[dim]Generating context summary for session {session_id[:12]}...[/dim]")
     console.print("[dim]This may take a moment...[/dim]")
@@ -563,7 +542,7 @@ def search(query: str, repo: Optional[str], limit: int):
 def web(host: str, port: int, debug: bool):
     """Start the web UI server."""
     try:
-        from .web.app import create_app
+        from .web.app import create_app, run_server
     except ImportError as e:
         console.print(f"[red]Error importing web module: {e}[/red]")
         console.print("[dim]Make sure Flask is installed: pip install flask[/dim]")
@@ -572,7 +551,7 @@ def web(host: str, port: int, debug: bool):
     app = create_app()
     console.print(f"[green]Starting web UI at http://{host}:{port}[/green]")
     console.print("[dim]Press Ctrl+C to stop[/dim]")
-    app.run(host=host, port=port, debug=debug)
+    run_server(host=host, port=port, debug=debug, app=app)
 
 
 if __name__ == "__main__":
@@ -15,7 +15,7 @@ import os
 from .timestamps import utc_now, parse_timestamp
 
 
-@dataclass
+@dataclass(slots=True)
 class CursorMessage:
     """Represents a parsed message from a Cursor session."""
     uuid: str
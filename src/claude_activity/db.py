@@ -1,10 +1,15 @@
 """SQLite database operations for Claude Activity Logger."""
 
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import contextmanager
-from datetime import datetime, date, timezone
+from datetime import datetime, date, timedelta, timezone
+from itertools import groupby
 from pathlib import Path
-from typing import Optional, Iterator, Any
+from typing import Optional, Callable, Iterable, Iterator, Any, TypeVar
 
 from .config import Config, get_config
 from .timestamps import utc_now, to_utc
@@ -115,10 +120,19 @@ CREATE TABLE IF NOT EXISTS summaries (
     period_start DATE NOT NULL,
     period_end DATE NOT NULL,
     summary TEXT NOT NULL,
+    prompt_hash TEXT,  -- SHA-256 of the prompt the summary was generated from
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(project_id, period_type, period_start)
 );
 
+-- Cached session context summaries, keyed by a hash of the prompt
+CREATE TABLE IF NOT EXISTS session_context_cache (
+    session_db_id INTEGER PRIMARY KEY REFERENCES sessions(id),
+    content_hash TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Track which files we've already processed
 CREATE TABLE IF NOT EXISTS processed_files (
     file_path TEXT PRIMARY KEY,
@@ -132,21 +146,148 @@ CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
 CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id);
 CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
 CREATE INDEX IF NOT EXISTS idx_summaries_period ON summaries(period_type, period_start);
+CREATE INDEX IF NOT EXISTS idx_summaries_period_start ON summaries(period_start DESC);
+"""
+
+T = TypeVar('T')
+
+# Per-session counts of user and assistant messages, so session lists
+# need not count messages. Kept up to date by triggers; existing
+# sessions are counted once.
+SESSION_COUNTS_SCHEMA = """
+ALTER TABLE sessions ADD COLUMN user_count INTEGER DEFAULT 0;
+ALTER TABLE sessions ADD COLUMN assistant_count INTEGER DEFAULT 0;
+
+UPDATE sessions SET
+    user_count = (SELECT COUNT(*) FROM messages m WHERE m.session_id = sessions.id AND m.role = 'user'),
+    assistant_count = (SELECT COUNT(*) FROM messages m WHERE m.session_id = sessions.id AND m.role = 'assistant');
+
+CREATE TRIGGER sessions_count_insert AFTER INSERT ON messages
+WHEN new.role IN ('user', 'assistant') BEGIN
+    UPDATE sessions SET user_count = user_count + (new.role = 'user'),
+                        assistant_count = assistant_count + (new.role = 'assistant')
+    WHERE id = new.session_id;
+END;
+
+CREATE TRIGGER sessions_count_delete AFTER DELETE ON messages
+WHEN old.role IN ('user', 'assistant') BEGIN
+    UPDATE sessions SET user_count = user_count - (old.role = 'user'),
+                        assistant_count = assistant_count - (old.role = 'assistant')
+    WHERE id = old.session_id;
+END;
+"""
+
+# Trigram full-text index over message content, kept in sync by triggers.
+# The trigram tokenizer lets FTS5 answer the same case-insensitive
+# LIKE '%text%' searches as the messages table, without scanning it.
+MESSAGES_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+
+CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+
+CREATE TRIGGER messages_fts_update AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+
+-- Index the messages stored before the table existed
+INSERT INTO messages_fts(messages_fts) VALUES ('rebuild');
+"""
+
+# Column order matches the row tuples taken by insert_messages_bulk
+INSERT_MESSAGE_SQL = """INSERT OR IGNORE INTO messages
+    (session_id, uuid, type, role, content, model, timestamp, tokens_in, tokens_out)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Message content with the whitespace str.strip() removes trimmed, for
+# matching Python-side content checks in SQL
+STRIPPED_CONTENT_SQL = "TRIM(content, ' ' || char(9, 10, 11, 12, 13))"
+
+# Most write jobs the writer thread will group into one transaction
+WRITER_BATCH_SIZE = 100
+
+# How long list_projects reuses the project list
+PROJECTS_CACHE_SECONDS = 30
+
+CONNECTION_PRAGMAS = """
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA mmap_size=268435456;
+PRAGMA cache_size=-65536;
+PRAGMA busy_timeout=5000;
 """
 
 
+class ConnectionPool:
+    """Idle connections kept open for reuse by any thread.
+
+    Connections are opened on demand; at most size idle ones are kept and
+    any beyond that are closed when released.
+    """
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], size: int):
+        self._connect = connect
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Close all idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
 class Database:
     """SQLite database wrapper for Claude activity data."""
 
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, pool_size: int = 0):
+        """Open the database, creating the schema if needed.
+
+        Args:
+            pool_size: Number of idle connections to keep open for reuse
+                (see ConnectionPool). 0 opens a new connection for every use.
+        """
         self.config = config or get_config()
         self.db_path = self.config.database.path
+        self._local = threading.local()
+        self._pool = ConnectionPool(self._connect, pool_size) if pool_size else None
+        self._projects_cache: Optional[tuple[float, list[dict]]] = None  # (loaded at, projects)
+        self._projects_lock = threading.Lock()
+        self._write_queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()  # Guards _writer and queueing jobs for it
         self._init_db()
 
     def _init_db(self):
         """Initialize database with schema."""
         self.config.ensure_directories()
         with self.connection() as conn:
+            # WAL lets the web UI and CLI read while the watcher writes; it
+            # persists in the database file, so it only needs setting once.
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.executescript(SCHEMA)
             # Migration: add source column if it doesn't exist
             cursor = conn.execute("PRAGMA table_info(sessions)")
@@ -159,12 +300,69 @@ class Database:
             if 'pending_question_time' not in columns:
                 conn.execute("ALTER TABLE sessions ADD COLUMN pending_question_time TIMESTAMP")
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_pending ON sessions(pending_question_time)")
+            # Migration: add user_count and assistant_count columns
+            if 'user_count' not in columns:
+                conn.executescript(f"BEGIN; {SESSION_COUNTS_SCHEMA} COMMIT;")
+            # Migration: add prompt_hash column to summaries if it doesn't exist
+            cursor = conn.execute("PRAGMA table_info(summaries)")
+            summary_columns = [row['name'] for row in cursor.fetchall()]
+            if 'prompt_hash' not in summary_columns:
+                conn.execute("ALTER TABLE summaries ADD COLUMN prompt_hash TEXT")
+            # Migration: add the message search index. SQLite builds without
+            # FTS5 or its trigram tokenizer (before 3.34) search by scanning.
+            find_index = "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'"
+            if conn.execute(find_index).fetchone() is None:
+                try:
+                    conn.executescript(f"BEGIN; {MESSAGES_FTS_SCHEMA} COMMIT;")
+                except sqlite3.OperationalError:
+                    conn.rollback()
+            self.has_search_index = conn.execute(find_index).fetchone() is not None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection performance settings.
+
+        synchronous=NORMAL skips the fsync on every commit under WAL. A crash
+        can lose the last few commits, but the session files on disk are
+        authoritative and get re-read from their last saved position.
+        """
+        # A pooled connection can be released by one thread and acquired by
+        # another, but is only ever used by one thread at a time
+        conn = sqlite3.connect(
+            self.db_path, detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=256,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.executescript(CONNECTION_PRAGMAS)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        return self._pool.acquire() if self._pool else self._connect()
+
+    def _release(self, conn: sqlite3.Connection):
+        if self._pool:
+            self._pool.release(conn)
+        else:
+            conn.close()
+
+    def close(self):
+        """Close pooled connections that are not in use."""
+        if self._pool:
+            self._pool.close()
 
     @contextmanager
     def connection(self) -> Iterator[sqlite3.Connection]:
-        """Context manager for database connections."""
-        conn = sqlite3.connect(self.db_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        conn.row_factory = sqlite3.Row
+        """Context manager for database connections.
+
+        Inside transaction() the thread's open connection is reused and
+        committing is left to the transaction.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        pinned = getattr(self._local, 'pinned', None)
+        conn = pinned or self._acquire()
         try:
             yield conn
             conn.commit()
@@ -172,7 +370,171 @@ class Database:
             conn.rollback()
             raise
         finally:
-            conn.close()
+            if pinned is None:
+                self._release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run all operations in the block as a single write transaction.
+
+        Database methods called inside the block on this thread share one
+        connection and are committed together (or rolled back on error).
+        Nested calls join the outer transaction.
+        """
+        with self._begin("BEGIN IMMEDIATE") as conn:
+            yield conn
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """Run all reads in the block against one consistent view of the data.
+
+        Like transaction(), but without taking the write lock: with WAL,
+        writers carry on and the block sees none of their commits.
+        """
+        with self._begin("BEGIN") as conn:
+            yield conn
+
+    @contextmanager
+    def _begin(self, begin_sql: str) -> Iterator[sqlite3.Connection]:
+        if getattr(self._local, 'conn', None) is not None:
+            yield self._local.conn
+            return
+
+        pinned = getattr(self._local, 'pinned', None)
+        conn = pinned or self._acquire()
+        conn.execute(begin_sql)
+        self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._local.conn = None
+            if pinned is None:
+                self._release(conn)
+
+    def pin_connection(self):
+        """Reuse one connection for this thread's calls until unpin_connection().
+
+        Saves reopening the database file for every call when several run
+        back to back, e.g. while serving one web request. Each connection()
+        block still commits on its own, so no write is held open.
+        """
+        if getattr(self._local, 'pinned', None) is None:
+            self._local.pinned = self._acquire()
+
+    def unpin_connection(self):
+        """Close the connection opened by pin_connection(), if any."""
+        conn = getattr(self._local, 'pinned', None)
+        if conn is not None:
+            self._local.pinned = None
+            self._release(conn)
+
+    # Writer thread
+    def start_writer(self):
+        """Start a thread that performs all run_write() jobs.
+
+        Funnelling writes from several threads through one writer avoids
+        them contending for SQLite's write lock, and lets jobs that queue
+        up together share a single commit.
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="db-writer", daemon=True)
+                self._writer.start()
+
+    def stop_writer(self):
+        """Finish queued writes and stop the writer thread.
+
+        run_write() calls made from now on run inline.
+        """
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._write_queue.put(None)
+        if writer is not None:
+            writer.join()
+
+    def run_write(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run fn(*args, **kwargs) in a write transaction and return its result.
+
+        With the writer thread running, the job is queued for it and this
+        call blocks until it has committed; otherwise it runs inline.
+        """
+        future: Optional[Future] = None
+        with self._writer_lock:
+            # Queued under the lock, so no job can land behind stop_writer()'s sentinel
+            if self._writer is not None and threading.current_thread() is not self._writer:
+                future = Future()
+                self._write_queue.put((future, fn, args, kwargs))
+        if future is None:
+            with self.transaction():
+                return fn(*args, **kwargs)
+        return future.result()
+
+    def _run_writer(self):
+        """Drain queued write jobs, committing each drained batch together."""
+        try:
+            self._drain_write_queue()
+        finally:
+            # Nothing should be left behind the sentinel, but never leave a caller waiting
+            while True:
+                try:
+                    job = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[0].set_exception(RuntimeError("Database writer stopped"))
+
+    def _drain_write_queue(self):
+        """Run queued write jobs in batches until the stop sentinel."""
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                return
+            batch = [job]
+            stopping = False
+            while len(batch) < WRITER_BATCH_SIZE:
+                try:
+                    job = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            self._run_write_batch(batch)
+            if stopping:
+                return
+
+    def _run_write_batch(self, batch: list[tuple]):
+        """Run a batch of write jobs in one transaction, isolating failures.
+
+        Each job runs under its own savepoint, so a failing job is rolled
+        back and reported to its caller without undoing the others.
+        """
+        outcomes = []
+        try:
+            with self.transaction() as conn:
+                for future, fn, args, kwargs in batch:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        outcomes.append((future, fn(*args, **kwargs), None))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_job")
+                        outcomes.append((future, None, e))
+                    conn.execute("RELEASE write_job")
+        except Exception as e:
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
 
     # Project operations
     def get_or_create_project(self, path: str, name: Optional[str] = None, org: Optional[str] = None) -> int:
@@ -187,6 +549,7 @@ class Database:
                 "INSERT INTO projects (path, name, org) VALUES (?, ?, ?)",
                 (path, name, org)
             )
+            self._projects_cache = None
             return cursor.lastrowid
 
     def get_project(self, project_id: int) -> Optional[dict]:
@@ -204,9 +567,31 @@ class Database:
             return dict(row) if row else None
 
     def list_projects(self) -> list[dict]:
-        """List all projects."""
+        """List all projects.
+
+        The list is reused for PROJECTS_CACHE_SECONDS, or until a project is
+        created through this Database. Projects created by another process
+        show up once the cache expires.
+        """
+        with self._projects_lock:
+            cached = self._projects_cache
+            if cached is None or time.monotonic() - cached[0] >= PROJECTS_CACHE_SECONDS:
+                with self.connection() as conn:
+                    cursor = conn.execute("SELECT * FROM projects ORDER BY name")
+                    cached = (time.monotonic(), [dict(row) for row in cursor.fetchall()])
+                self._projects_cache = cached
+        return list(cached[1])
+
+    def list_projects_with_session_counts(self) -> list[dict]:
+        """List all projects with their number of sessions as session_count."""
         with self.connection() as conn:
-            cursor = conn.execute("SELECT * FROM projects ORDER BY name")
+            cursor = conn.execute("""
+                SELECT p.*, COUNT(s.id) AS session_count
+                FROM projects p
+                LEFT JOIN sessions s ON s.project_id = p.id
+                GROUP BY p.id
+                ORDER BY p.name
+            """)
             return [dict(row) for row in cursor.fetchall()]
 
     # Session operations
@@ -231,14 +616,49 @@ class Database:
             )
             return cursor.lastrowid
 
+    def get_or_create_project_and_session(
+        self,
+        project_path: str,
+        name: Optional[str],
+        org: Optional[str],
+        session_id: str,
+        source: str = 'claude_code',
+        git_branch: Optional[str] = None
+    ) -> tuple[int, int]:
+        """Get or create a project and one of its sessions in one round trip.
+
+        Existing rows are left unchanged (the no-op upserts only serve to
+        return their IDs). Returns (project_id, session_db_id).
+        """
+        with self.connection() as conn:
+            project_id = conn.execute(
+                """INSERT INTO projects (path, name, org) VALUES (?, ?, ?)
+                   ON CONFLICT(path) DO UPDATE SET path = excluded.path
+                   RETURNING id""",
+                (project_path, name, org)
+            ).fetchone()[0]
+            # The upsert cannot tell whether the project is new
+            self._projects_cache = None
+            session_db_id = conn.execute(
+                """INSERT INTO sessions (session_id, project_id, git_branch, source) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(session_id) DO UPDATE SET session_id = excluded.session_id
+                   RETURNING id""",
+                (session_id, project_id, git_branch, source)
+            ).fetchone()[0]
+            return project_id, session_db_id
+
     def update_session(
         self,
         session_id: str,
         started_at: Optional[datetime] = None,
         ended_at: Optional[datetime] = None,
-        message_count: Optional[int] = None
+        message_count: Optional[int] = None,
+        git_branch: Optional[str] = None
     ):
-        """Update session metadata."""
+        """Update session metadata.
+
+        git_branch is only recorded if the session does not have one yet.
+        """
         with self.connection() as conn:
             updates = []
             params = []
@@ -252,6 +672,9 @@ class Database:
             if message_count is not None:
                 updates.append("message_count = message_count + ?")
                 params.append(message_count)
+            if git_branch is not None:
+                updates.append("git_branch = COALESCE(git_branch, ?)")
+                params.append(git_branch)
 
             if updates:
                 params.append(session_id)
@@ -286,6 +709,23 @@ class Database:
             row = cursor.fetchone()
             return dict(row) if row else None
 
+    def find_session_id(self, prefix: str) -> Optional[str]:
+        """Get the UUID of a session whose UUID starts with prefix.
+
+        Uses a range on the session_id index rather than LIKE, which would
+        scan the table and treat '%' and '_' in the prefix as wildcards.
+        """
+        if not prefix:
+            return None
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "SELECT session_id FROM sessions WHERE session_id >= ? AND session_id < ? LIMIT 1",
+                (prefix, upper)
+            )
+            row = cursor.fetchone()
+            return row['session_id'] if row else None
+
     def list_sessions(
         self,
         project_id: Optional[int] = None,
@@ -329,27 +769,66 @@ class Database:
     ) -> Optional[int]:
         """Insert a message, returning message ID. Returns None if duplicate."""
         with self.connection() as conn:
-            try:
-                cursor = conn.execute(
-                    """INSERT INTO messages
-                       (session_id, uuid, type, role, content, model, timestamp, tokens_in, tokens_out)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (session_db_id, uuid, msg_type, role, content, model, timestamp, tokens_in, tokens_out)
-                )
-                return cursor.lastrowid
-            except sqlite3.IntegrityError:
-                # Duplicate UUID, skip
-                return None
+            cursor = conn.execute(
+                INSERT_MESSAGE_SQL,
+                (session_db_id, uuid, msg_type, role, content, model, timestamp, tokens_in, tokens_out)
+            )
+            # Duplicate UUID, skipped
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def insert_messages_bulk(
+        self,
+        session_db_id: int,
+        messages: Iterable[tuple]
+    ) -> list[dict]:
+        """Insert many messages for one session with a single executemany call.
+
+        Args:
+            session_db_id: Database ID of the session
+            messages: Tuples of (uuid, type, role, content, model, timestamp,
+                tokens_in, tokens_out); duplicates by UUID are skipped
 
-    def get_messages_for_session(self, session_db_id: int) -> list[dict]:
-        """Get all messages for a session."""
+        Returns:
+            role and timestamp of each newly inserted message, in insertion order
+        """
         with self.connection() as conn:
+            max_before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+            conn.executemany(INSERT_MESSAGE_SQL, ((session_db_id, *message) for message in messages))
             cursor = conn.execute(
-                "SELECT * FROM messages WHERE session_id = ? ORDER BY timestamp",
-                (session_db_id,)
+                "SELECT role, timestamp FROM messages WHERE session_id = ? AND id > ? ORDER BY id",
+                (session_db_id, max_before)
             )
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_messages_for_session(self, session_db_id: int, exclude_tools: bool = False) -> list[dict]:
+        """Get all messages for a session.
+
+        With exclude_tools, messages without a role or text and tool-only
+        messages ("[Tool: ...]" calls and "[Tool Result]") are left out.
+        """
+        query = "SELECT * FROM messages WHERE session_id = ?"
+        if exclude_tools:
+            query += f"""
+                AND role IS NOT NULL AND role != ''
+                AND {STRIPPED_CONTENT_SQL} != ''
+                AND SUBSTR({STRIPPED_CONTENT_SQL}, 1, 6) != '[Tool:'
+                AND {STRIPPED_CONTENT_SQL} != '[Tool Result]'
+            """
+        with self.connection() as conn:
+            cursor = conn.execute(query + " ORDER BY timestamp", (session_db_id,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_last_message_id(self, session_id: str) -> Optional[int]:
+        """Get the id of the newest message stored for a session (by UUID)."""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                """SELECT MAX(m.id) FROM messages m
+                   JOIN sessions s ON m.session_id = s.id
+                   WHERE s.session_id = ?""",
+                (session_id,)
+            )
+            return cursor.fetchone()[0]
+
     def get_messages_in_range(
         self,
         start: datetime,
@@ -380,6 +859,94 @@ class Database:
                 )
             return [dict(row) for row in cursor.fetchall()]
 
+    def get_messages_in_range_truncated(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: Optional[int] = None,
+        limit_chars: int = 300,
+        role: Optional[str] = None
+    ) -> list[dict]:
+        """Get messages in a time range with content cut to limit_chars by SQLite.
+
+        Each row has a 'truncated' flag set when the stored content was longer,
+        so long message bodies never cross into Python in full.
+        """
+        with self.connection() as conn:
+            query = """SELECT m.id, m.uuid, m.type, m.role, m.timestamp,
+                              substr(m.content, 1, ?) AS content,
+                              length(m.content) > ? AS truncated,
+                              s.session_id as session_uuid, p.name as project_name
+                       FROM messages m
+                       JOIN sessions s ON m.session_id = s.id
+                       LEFT JOIN projects p ON s.project_id = p.id
+                       WHERE m.timestamp >= ? AND m.timestamp < ?"""
+            params = [limit_chars, limit_chars, start, end]
+            if project_id is not None:
+                query += " AND s.project_id = ?"
+                params.append(project_id)
+            if role is not None:
+                query += " AND m.role = ?"
+                params.append(role)
+            query += " ORDER BY m.timestamp"
+
+            cursor = conn.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_user_messages_and_assistant_counts(
+        self,
+        start: datetime,
+        end: datetime,
+        project_id: Optional[int] = None,
+        limit_chars: int = 300
+    ) -> tuple[list[dict], dict[Optional[str], int]]:
+        """Get truncated user messages and per-project assistant message counts.
+
+        Assistant message bodies are never read; only their count per
+        project name is returned.
+        """
+        user_messages = self.get_messages_in_range_truncated(
+            start, end, project_id, limit_chars, role='user'
+        )
+        with self.connection() as conn:
+            query = """SELECT p.name as project_name, COUNT(*) as count
+                       FROM messages m
+                       JOIN sessions s ON m.session_id = s.id
+                       LEFT JOIN projects p ON s.project_id = p.id
+                       WHERE m.timestamp >= ? AND m.timestamp < ? AND m.role = 'assistant'"""
+            params = [start, end]
+            if project_id is not None:
+                query += " AND s.project_id = ?"
+                params.append(project_id)
+            query += " GROUP BY p.name"
+
+            cursor = conn.execute(query, params)
+            assistant_counts = {row["project_name"]: row["count"] for row in cursor.fetchall()}
+        return user_messages, assistant_counts
+
+    def get_messages_bucketed_by_date(
+        self,
+        start: date,
+        end: date,
+        project_id: Optional[int] = None,
+        limit_chars: Optional[int] = None
+    ) -> dict[date, list[dict]]:
+        """Get messages for the days start..end (inclusive) in one query, grouped by date.
+
+        If limit_chars is given, content is truncated in SQL as in
+        get_messages_in_range_truncated.
+        """
+        range_start = datetime.combine(start, datetime.min.time())
+        range_end = datetime.combine(end + timedelta(days=1), datetime.min.time())
+        if limit_chars is not None:
+            messages = self.get_messages_in_range_truncated(range_start, range_end, project_id, limit_chars)
+        else:
+            messages = self.get_messages_in_range(range_start, range_end, project_id)
+        return {
+            day: list(rows)
+            for day, rows in groupby(messages, key=lambda m: m['timestamp'].date())
+        }
+
     # Processed files tracking
     def get_last_position(self, file_path: str) -> int:
         """Get last read position for a file."""
@@ -391,6 +958,27 @@ class Database:
             row = cursor.fetchone()
             return row["last_position"] if row else 0
 
+    def get_file_state(self, file_path: str, session_id: str) -> tuple[int, Optional[int]]:
+        """Get a file's last read position and its session's ID in one query.
+
+        Returns (last_position, session_db_id); session_db_id is None if the
+        session has not been recorded yet.
+        """
+        with self.connection() as conn:
+            row = conn.execute(
+                """SELECT
+                       (SELECT last_position FROM processed_files WHERE file_path = ?),
+                       (SELECT id FROM sessions WHERE session_id = ?)""",
+                (file_path, session_id)
+            ).fetchone()
+            return row[0] or 0, row[1]
+
+    def list_tracked_paths(self) -> dict[str, int]:
+        """Get last read position for every tracked file, keyed by path."""
+        with self.connection() as conn:
+            cursor = conn.execute("SELECT file_path, last_position FROM processed_files")
+            return {row["file_path"]: row["last_position"] for row in cursor.fetchall()}
+
     def update_position(self, file_path: str, position: int, modified: Optional[datetime] = None):
         """Update last read position for a file."""
         with self.connection() as conn:
@@ -410,9 +998,14 @@ class Database:
         period_start: date,
         period_end: date,
         summary: str,
-        project_id: Optional[int] = None
+        project_id: Optional[int] = None,
+        prompt_hash: Optional[str] = None
     ):
-        """Save a summary, replacing if exists."""
+        """Save a summary, replacing if exists.
+
+        prompt_hash optionally records the hash of the input the summary was
+        generated from, so unchanged input can skip regeneration.
+        """
         with self.connection() as conn:
             # Delete existing summary first (handles NULL project_id correctly)
             if project_id is not None:
@@ -427,9 +1020,9 @@ class Database:
                 )
             # Insert new summary
             conn.execute(
-                """INSERT INTO summaries (project_id, period_type, period_start, period_end, summary)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (project_id, period_type, period_start, period_end, summary)
+                """INSERT INTO summaries (project_id, period_type, period_start, period_end, summary, prompt_hash)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (project_id, period_type, period_start, period_end, summary, prompt_hash)
             )
 
     def get_summary(
@@ -478,6 +1071,30 @@ class Database:
                 )
             return [dict(row) for row in cursor.fetchall()]
 
+    # Session context cache
+    def get_cached_session_context(self, session_db_id: int, content_hash: str) -> Optional[str]:
+        """Get a cached session context if it was generated from identical input."""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "SELECT summary FROM session_context_cache WHERE session_db_id = ? AND content_hash = ?",
+                (session_db_id, content_hash)
+            )
+            row = cursor.fetchone()
+            return row["summary"] if row else None
+
+    def save_session_context(self, session_db_id: int, content_hash: str, summary: str):
+        """Cache a generated session context, replacing any previous one for the session."""
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO session_context_cache (session_db_id, content_hash, summary, created_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(session_db_id) DO UPDATE SET
+                   content_hash = excluded.content_hash,
+                   summary = excluded.summary,
+                   created_at = excluded.created_at""",
+                (session_db_id, content_hash, summary, utc_now())
+            )
+
     def get_unsummarized_days(self, project_id: Optional[int] = None) -> list[date]:
         """Get dates that have messages but no daily summary."""
         with self.connection() as conn:
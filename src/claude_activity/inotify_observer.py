@@ -0,0 +1,137 @@
+"""Lightweight inotify-based observer for Linux.
+
+A drop-in replacement for watchdog's Observer in the watcher daemon. It
+watches only the masks the handlers act on and never descends into
+subagent directories, so it needs fewer watches and delivers fewer
+events than watchdog's recursive inotify emitter.
+
+Requires the optional inotify_simple package; see INOTIFY_AVAILABLE.
+"""
+
+import logging
+import os
+import select
+from threading import Event, Thread
+
+from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileSystemEventHandler
+
+try:
+    from inotify_simple import INotify, flags
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INotify = None
+    flags = None
+    INOTIFY_AVAILABLE = False
+
+
+logger = logging.getLogger(__name__)
+
+# Directories that never contain files the handlers process
+SKIP_DIRS = ('subagents',)
+
+
+class InotifyObserver(Thread):
+    """Recursive inotify watcher dispatching watchdog file events to handlers."""
+
+    def __init__(self):
+        super().__init__(name="inotify-observer", daemon=True)
+        self._inotify = INotify()
+        self._mask = flags.MODIFY | flags.CREATE | flags.MOVED_TO | flags.DELETE_SELF
+        self._dirs: dict[int, tuple[str, FileSystemEventHandler]] = {}  # wd -> (dir, handler)
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopped = Event()
+
+    def schedule(self, handler: FileSystemEventHandler, path: str, recursive: bool = True):
+        """Watch path and its subdirectories for handler (always recursive)."""
+        self._add_tree(path, handler)
+
+    def stop(self):
+        """Stop the thread and close the inotify and wake-up descriptors.
+
+        The descriptors are only closed here, after the thread has exited,
+        so the wake-up write can never land in a reused descriptor.
+        """
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self.is_alive():
+            os.write(self._wake_w, b'\0')
+            self.join()
+        self._inotify.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def _add_tree(self, root: str, handler: FileSystemEventHandler, report_files: bool = False):
+        """Add watches for root and its subdirectories.
+
+        With report_files, files already present are dispatched as created:
+        they may have been written before the new directory was watched.
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                wd = self._inotify.add_watch(directory, self._mask)
+                self._dirs[wd] = (directory, handler)
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(entry.path)
+                        elif report_files:
+                            handler.dispatch(FileCreatedEvent(entry.path))
+            except OSError as e:
+                logger.warning(f"Could not watch {directory}: {e}")
+
+    def run(self):
+        try:
+            while not self._stopped.is_set():
+                # Block until there are events or stop() writes to the wake pipe
+                ready, _, _ = select.select([self._inotify, self._wake_r], [], [])
+                if self._inotify in ready:
+                    for event in self._inotify.read(timeout=0):
+                        self._dispatch(event)
+        except Exception as e:
+            logger.error(f"inotify observer stopped: {e}")
+
+    def _rescan(self):
+        """Report every file in the watched directories as modified.
+
+        Used after the kernel's event queue overflowed and events were lost;
+        files that have not changed are skipped cheaply by the handlers.
+        Directories created meanwhile are watched and their files reported.
+        """
+        watched = {directory for directory, _ in self._dirs.values()}
+        for directory, handler in list(self._dirs.values()):
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if not entry.is_dir(follow_symlinks=False):
+                            handler.dispatch(FileModifiedEvent(entry.path))
+                        elif entry.name not in SKIP_DIRS and entry.path not in watched:
+                            self._add_tree(entry.path, handler, report_files=True)
+            except OSError as e:
+                logger.warning(f"Could not rescan {directory}: {e}")
+
+    def _dispatch(self, event):
+        if event.mask & flags.Q_OVERFLOW:
+            logger.warning("inotify event queue overflowed; rescanning watched directories")
+            self._rescan()
+            return
+        if event.mask & flags.IGNORED:
+            # Watch removed, e.g. after the directory was deleted
+            self._dirs.pop(event.wd, None)
+            return
+        watched = self._dirs.get(event.wd)
+        if watched is None or not event.name:
+            return
+
+        directory, handler = watched
+        path = os.path.join(directory, event.name)
+        if event.mask & flags.ISDIR:
+            if event.mask & (flags.CREATE | flags.MOVED_TO) and event.name not in SKIP_DIRS:
+                self._add_tree(path, handler, report_files=True)
+        elif event.mask & (flags.CREATE | flags.MOVED_TO):
+            handler.dispatch(FileCreatedEvent(path))
+        elif event.mask & flags.MODIFY:
+            handler.dispatch(FileModifiedEvent(path))
@@ -4,19 +4,34 @@ For timestamp handling conventions, see timestamps.py.
 """
 
 import json
+import threading
 from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Iterator, Any
 
 from .timestamps import parse_timestamp as ts_parse_timestamp, utc_now
 
+# orjson decodes JSONL lines several times faster; fall back to stdlib json.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch one type.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# Session files are read in chunks into a reusable per-thread buffer
+READ_CHUNK_SIZE = 1 << 16
+_read_buffers = threading.local()
+
+# Common code directories that are not an org when they hold a project
+ORG_SKIP_DIRS = frozenset({'code', 'projects', 'src', 'repos', 'github', 'work', 'personal', 'dev', 'home', 'Users'})
 
 # Cache for the common prefix (computed once per run)
 _common_prefix_cache: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedMessage:
     """Represents a parsed message from a Claude session."""
     uuid: str
@@ -41,10 +56,8 @@ def decode_project_path(dir_name: str) -> str:
     """
     if not dir_name.startswith('-'):
         return dir_name
-    # Replace first dash with /, then all remaining dashes with /
-    # But we need to handle multi-dash sequences and edge cases
-    parts = dir_name[1:].split('-')
-    return '/' + '/'.join(parts)
+    # Every dash, including the leading one, was a path separator
+    return dir_name.replace('-', '/')
 
 
 def get_common_project_prefix(claude_projects_dir: Optional[Path] = None) -> str:
@@ -131,10 +144,13 @@ def extract_project_name_from_dir(dir_name: str, claude_projects_dir: Optional[P
     return dir_name.lstrip('-')
 
 
+@lru_cache(maxsize=1024)
 def extract_project_info(project_path: str, claude_projects_dir: Optional[Path] = None) -> tuple[str, Optional[str]]:
     """Extract project name and optional org from path.
 
     Uses the common prefix across all projects to derive a meaningful name.
+    Cached: the prefix is computed once per process, so the result for a
+    path never changes, and the watcher asks for every session of a project.
 
     Returns:
         Tuple of (name, org) where org may be None
@@ -155,9 +171,7 @@ def extract_project_info(project_path: str, claude_projects_dir: Optional[Path]
     # Check for patterns like .../org/repo or .../username/repo
     if len(parts) >= 2:
         parent = parts[-2]
-        # Common code directories to skip as org
-        skip_dirs = {'code', 'projects', 'src', 'repos', 'github', 'work', 'personal', 'dev', 'home', 'Users'}
-        if parent not in skip_dirs and not parent.startswith('.'):
+        if parent not in ORG_SKIP_DIRS and not parent.startswith('.'):
             org = parent
 
     return name, org
@@ -166,7 +180,8 @@ def extract_project_info(project_path: str, claude_projects_dir: Optional[Path]
 def extract_text_content(content: Any) -> Optional[str]:
     """Extract text content from various message content formats.
 
-    Only returns actual text content. Returns None for:
+    Only returns actual text content, followed by a '[Tool: name]' line
+    for each tool call made alongside it. Returns None for:
     - Empty content
     - Tool-only messages (tool_use, tool_result)
     - Thinking-only messages
@@ -178,19 +193,27 @@ def extract_text_content(content: Any) -> Optional[str]:
         return content if content.strip() else None
 
     if isinstance(content, list):
-        # Handle content blocks format - only extract actual text
+        # Handle content blocks format in one pass, joining once at the end
         text_parts = []
+        tool_markers = []
         for block in content:
             if isinstance(block, dict):
-                if block.get('type') == 'text':
+                block_type = block.get('type')
+                if block_type == 'text':
                     text = block.get('text', '')
                     if text.strip():
                         text_parts.append(text)
-                # Skip tool_use, tool_result, thinking - they don't have user-visible text
+                elif block_type == 'tool_use':
+                    tool_markers.append(f"[Tool: {block.get('name', 'unknown')}]")
+                # Skip tool_result, thinking - they don't have user-visible text
             elif isinstance(block, str):
                 if block.strip():
                     text_parts.append(block)
-        return '\n'.join(text_parts) if text_parts else None
+        if not text_parts:
+            return None
+        # Markers go after the text, so content never starts with '[Tool:'
+        text_parts.extend(tool_markers)
+        return '\n'.join(text_parts)
 
     if isinstance(content, dict):
         if 'text' in content:
@@ -215,7 +238,7 @@ def parse_timestamp(ts: Any) -> datetime:
 def parse_message(line: str) -> Optional[ParsedMessage]:
     """Parse a single JSONL line into a ParsedMessage."""
     try:
-        data = json.loads(line.strip())
+        data = json_loads(line.strip())
     except json.JSONDecodeError:
         return None
 
@@ -298,6 +321,44 @@ def parse_message(line: str) -> Optional[ParsedMessage]:
     )
 
 
+def _iter_lines(f, start_position: int) -> Iterator[tuple[bytes | memoryview, int]]:
+    """Yield (line, end_position) for each line read from an unbuffered file.
+
+    Lines that fit in the read buffer are yielded as views into it and are
+    only valid until the next iteration. A line spanning reads is kept as a
+    list of pieces and joined once, when its newline arrives.
+    """
+    buf = getattr(_read_buffers, 'free', None) or bytearray(READ_CHUNK_SIZE)
+    _read_buffers.free = None  # Taken; a nested read gets its own buffer
+    view = memoryview(buf)
+    pos = start_position
+    pieces = []  # Start of a line continuing past the buffer
+    try:
+        f.seek(start_position)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            start = 0
+            while (newline := buf.find(b'\n', start, n)) >= 0:
+                line = view[start:newline + 1]
+                if pieces:
+                    pieces.append(line)
+                    line = b''.join(pieces)
+                    pieces = []
+                pos += len(line)
+                yield line, pos
+                start = newline + 1
+            if start < n:
+                pieces.append(bytes(view[start:n]))
+        if pieces:
+            line = b''.join(pieces)
+            yield line, pos + len(line)
+    finally:
+        view.release()
+        _read_buffers.free = buf
+
+
 def parse_session_file(
     file_path: Path,
     start_position: int = 0
@@ -310,23 +371,22 @@ def parse_session_file(
 
     Yields:
         Tuples of (ParsedMessage, end_position)
-    """
-    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-        f.seek(start_position)
-
-        while True:
-            line = f.readline()
-            if not line:
-                break
-
-            end_pos = f.tell()
 
+    Only the bytes after start_position are read. A trailing line without a
+    newline is yielded only if it parses; otherwise it is treated as still
+    being written and left for the next call.
+    """
+    with open(file_path, 'rb', buffering=0) as f:
+        for raw_line, end_pos in _iter_lines(f, start_position):
+            line = str(raw_line, 'utf-8', 'replace')
             if not line.strip():
                 continue
 
             message = parse_message(line)
             if message:
                 yield message, end_pos
+            elif not line.endswith('\n'):
+                break
 
 
 def get_session_id_from_path(file_path: Path) -> str:
@@ -21,6 +21,9 @@ from .timestamps import (
 # Pending questions older than this are not highlighted (considered abandoned)
 PENDING_QUESTION_MAX_AGE_DAYS = 3
 
+# Condition on sessions s: it has user or assistant messages, not only system ones
+HAS_CONVERSATION_SQL = "(s.user_count > 0 OR s.assistant_count > 0)"
+
 
 def get_today_range() -> tuple[datetime, datetime]:
     """Get datetime range for today in UTC (for querying UTC-stored timestamps).
@@ -78,9 +81,9 @@ def get_month_range(month_offset: int = 0) -> tuple[date, date]:
 class QueryHelper:
     """Helper class for CLI queries."""
 
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, db: Optional[Database] = None):
         self.config = config or get_config()
-        self.db = Database(self.config)
+        self.db = db or Database(self.config)
 
     def get_project_id_by_name(self, name: str) -> Optional[int]:
         """Find project ID by name (partial match)."""
@@ -126,72 +129,78 @@ class QueryHelper:
         self,
         project_id: Optional[int] = None,
         since: Optional[datetime] = None,
-        limit: int = 20
+        limit: int = 20,
+        before_id: Optional[int] = None,
+        nonempty: bool = False
     ) -> list[dict]:
         """Get recent sessions with message counts and first message snippet.
 
         Sessions with pending questions (asked within the last 3 days) are sorted first.
+        Pass the id of the last session of a page as before_id to get the next page.
+        With nonempty, sessions without user or assistant messages (only
+        system messages) are left out.
         """
         # Calculate cutoff for pending questions
         pending_cutoff = utc_now() - timedelta(days=PENDING_QUESTION_MAX_AGE_DAYS)
 
-        # Get sessions with custom sorting (pending questions first)
+        # Get sessions with custom sorting (pending questions first). Every
+        # session gets a sort key of (pending, time, id) so later pages can
+        # continue after the key of a given session instead of skipping rows.
         with self.db.connection() as conn:
             query = """
-                SELECT s.*, p.name as project_name, p.path as project_path,
-                    CASE
-                        WHEN s.pending_question IS NOT NULL
-                             AND s.pending_question_time >= ?
-                        THEN 1
-                        ELSE 0
-                    END as has_active_pending
-                FROM sessions s
+                WITH keys AS (
+                    SELECT id,
+                        CASE
+                            WHEN pending_question IS NOT NULL
+                                 AND pending_question_time >= :pending_cutoff
+                            THEN 1
+                            ELSE 0
+                        END as has_active_pending,
+                        COALESCE(CASE
+                            WHEN pending_question IS NOT NULL
+                                 AND pending_question_time >= :pending_cutoff
+                            THEN pending_question_time
+                            ELSE started_at
+                        END, '') as sort_time
+                    FROM sessions
+                )
+                SELECT s.*, p.name as project_name, p.path as project_path, k.has_active_pending
+                FROM keys k
+                JOIN sessions s ON s.id = k.id
                 LEFT JOIN projects p ON s.project_id = p.id
             """
             conditions = []
-            params = [pending_cutoff]
+            params = {'pending_cutoff': pending_cutoff, 'limit': limit}
 
             if project_id is not None:
-                conditions.append("s.project_id = ?")
-                params.append(project_id)
+                conditions.append("s.project_id = :project_id")
+                params['project_id'] = project_id
             if since is not None:
-                conditions.append("s.started_at >= ?")
-                params.append(since)
+                conditions.append("s.started_at >= :since")
+                params['since'] = since
+            if nonempty:
+                conditions.append(HAS_CONVERSATION_SQL)
+            if before_id is not None:
+                conditions.append("""(k.has_active_pending, k.sort_time, k.id) < (
+                    SELECT has_active_pending, sort_time, id FROM keys WHERE id = :before_id
+                )""")
+                params['before_id'] = before_id
 
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
 
             # Sort: pending questions first (by question time desc), then by start time desc
             query += """
-                ORDER BY has_active_pending DESC,
-                         CASE WHEN has_active_pending = 1 THEN s.pending_question_time ELSE s.started_at END DESC
-                LIMIT ?
+                ORDER BY k.has_active_pending DESC, k.sort_time DESC, k.id DESC
+                LIMIT :limit
             """
-            params.append(limit)
 
             cursor = conn.execute(query, params)
             sessions = [dict(row) for row in cursor.fetchall()]
 
         # Enrich with message data and parse pending question
+        self._add_message_stats(sessions, snippet_length=150)
         for session in sessions:
-            messages = self.db.get_messages_for_session(session['id'])
-            user_messages = [m for m in messages if m.get('role') == 'user']
-            session['user_count'] = len(user_messages)
-            session['assistant_count'] = len([m for m in messages if m.get('role') == 'assistant'])
-
-            # Get first user message as snippet
-            session['first_message'] = None
-            for msg in user_messages:
-                content = msg.get('content') or ''
-                content = content.strip()
-                if content and not content.startswith('[Tool:'):
-                    # Get first line or first 150 chars
-                    first_line = content.split('\n')[0]
-                    if len(first_line) > 150:
-                        first_line = first_line[:150] + '...'
-                    session['first_message'] = first_line
-                    break
-
             # Parse pending question JSON and check if it's still active
             session['pending_question_data'] = None
             if session.get('pending_question') and session.get('has_active_pending'):
@@ -202,13 +211,52 @@ class QueryHelper:
 
         return sessions
 
-    def get_session_detail(self, session_id: str) -> Optional[dict]:
-        """Get detailed session information."""
+    def _add_message_stats(self, sessions: list[dict], snippet_length: int):
+        """Set first_message on each session.
+
+        first_message is the first line of the first user message that is
+        not a tool call, cut to snippet_length characters. Messages for all
+        sessions are loaded together instead of one query per session.
+        (user_count and assistant_count are columns of sessions.)
+        """
+        by_id = {}
+        for session in sessions:
+            session['first_message'] = None
+            by_id[session['id']] = session
+        if not by_id:
+            return
+
+        placeholders = ", ".join("?" * len(by_id))
+        with self.db.connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT session_id, content
+                FROM messages
+                WHERE session_id IN ({placeholders}) AND role = 'user'
+                ORDER BY session_id, timestamp
+            """, list(by_id))
+            for row in cursor:
+                session = by_id[row['session_id']]
+                if session['first_message'] is not None:
+                    continue
+                content = (row['content'] or '').strip()
+                if content and not content.startswith('[Tool:'):
+                    # Get first line, truncated to snippet_length chars
+                    first_line = content.split('\n')[0]
+                    if len(first_line) > snippet_length:
+                        first_line = first_line[:snippet_length] + '...'
+                    session['first_message'] = first_line
+
+    def get_session_detail(self, session_id: str, exclude_tools: bool = False) -> Optional[dict]:
+        """Get detailed session information.
+
+        With exclude_tools, only messages with text are included (see
+        Database.get_messages_for_session).
+        """
         session = self.db.get_session(session_id)
         if not session:
             return None
 
-        messages = self.db.get_messages_for_session(session['id'])
+        messages = self.db.get_messages_for_session(session['id'], exclude_tools=exclude_tools)
         session['messages'] = messages
 
         # Get project info
@@ -222,6 +270,20 @@ class QueryHelper:
         """Get overall statistics."""
         return self.db.get_stats(since)
 
+    def get_dashboard(self) -> dict:
+        """Get the dashboard data: today's activity, overall stats and the
+        recent projects with their sessions, read from one snapshot.
+        """
+        with self.db.snapshot():
+            return {
+                'today': self.get_today_activity(),
+                'stats': self.db.get_stats(),
+                'recent_activity': self.get_recent_projects_with_sessions(
+                    project_limit=4,
+                    sessions_per_project=3
+                ),
+            }
+
     def get_recent_projects_with_sessions(
         self,
         project_limit: int = 4,
@@ -249,8 +311,9 @@ class QueryHelper:
         pending_cutoff = utc_now() - timedelta(days=PENDING_QUESTION_MAX_AGE_DAYS)
 
         with self.db.connection() as conn:
-            # Get projects with their most recent session timestamp and pending status
-            cursor = conn.execute("""
+            # Get projects with their most recent session timestamp and pending
+            # status, counting only sessions with actual messages
+            cursor = conn.execute(f"""
                 SELECT p.*,
                        MAX(s.started_at) as last_activity,
                        MAX(CASE
@@ -261,75 +324,73 @@ class QueryHelper:
                        END) as has_pending
                 FROM projects p
                 JOIN sessions s ON s.project_id = p.id
+                WHERE {HAS_CONVERSATION_SQL}
                 GROUP BY p.id
                 ORDER BY has_pending DESC, last_activity DESC
                 LIMIT ?
             """, (pending_cutoff, project_limit))
             projects_with_activity = [dict(row) for row in cursor.fetchall()]
 
-        result = []
-        for proj in projects_with_activity:
-            # Get recent sessions for this project with pending question sorting
-            with self.db.connection() as conn:
-                cursor = conn.execute("""
+        if not projects_with_activity:
+            return []
+
+        # Get the recent sessions of all these projects at once, ranked
+        # within each project with pending questions first
+        project_ids = [proj['id'] for proj in projects_with_activity]
+        placeholders = ", ".join("?" * len(project_ids))
+        with self.db.connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT * FROM (
                     SELECT s.*, p.name as project_name, p.path as project_path,
                         CASE
                             WHEN s.pending_question IS NOT NULL
                                  AND s.pending_question_time >= ?
                             THEN 1
                             ELSE 0
-                        END as has_active_pending
+                        END as has_active_pending,
+                        ROW_NUMBER() OVER (
+                            PARTITION BY s.project_id
+                            ORDER BY
+                                CASE
+                                    WHEN s.pending_question IS NOT NULL
+                                         AND s.pending_question_time >= ?
+                                    THEN s.pending_question_time
+                                END DESC,
+                                s.started_at DESC
+                        ) as project_rank
                     FROM sessions s
                     LEFT JOIN projects p ON s.project_id = p.id
-                    WHERE s.project_id = ?
-                    ORDER BY has_active_pending DESC,
-                             CASE WHEN has_active_pending = 1 THEN s.pending_question_time ELSE s.started_at END DESC
-                    LIMIT ?
-                """, (pending_cutoff, proj['id'], sessions_per_project))
-                sessions = [dict(row) for row in cursor.fetchall()]
-
-            # Enrich sessions with message counts and first message
-            enriched_sessions = []
-            for session in sessions:
-                messages = self.db.get_messages_for_session(session['id'])
-                user_messages = [m for m in messages if m.get('role') == 'user']
-
-                session['user_count'] = len(user_messages)
-                session['assistant_count'] = len([m for m in messages if m.get('role') == 'assistant'])
-
-                # Get first user message as snippet
-                session['first_message'] = None
-                for msg in user_messages:
-                    content = msg.get('content') or ''
-                    content = content.strip()
-                    if content and not content.startswith('[Tool:'):
-                        first_line = content.split('\n')[0]
-                        if len(first_line) > 100:
-                            first_line = first_line[:100] + '...'
-                        session['first_message'] = first_line
-                        break
-
-                # Parse pending question JSON
-                session['pending_question_data'] = None
-                if session.get('pending_question') and session.get('has_active_pending'):
-                    try:
-                        session['pending_question_data'] = json.loads(session['pending_question'])
-                    except (json.JSONDecodeError, TypeError):
-                        pass
-
-                # Only include sessions with actual messages
-                if session['user_count'] > 0 or session['assistant_count'] > 0:
-                    enriched_sessions.append(session)
-
-            if enriched_sessions:
-                result.append({
-                    'project': proj,
-                    'last_activity': proj['last_activity'],
-                    'has_pending': bool(proj.get('has_pending')),
-                    'sessions': enriched_sessions
-                })
-
-        return result
+                    WHERE s.project_id IN ({placeholders}) AND {HAS_CONVERSATION_SQL}
+                )
+                WHERE project_rank <= ?
+                ORDER BY project_rank
+            """, (pending_cutoff, pending_cutoff, *project_ids, sessions_per_project))
+            sessions = [dict(row) for row in cursor.fetchall()]
+
+        # Enrich sessions with message counts and first message
+        self._add_message_stats(sessions, snippet_length=100)
+        sessions_by_project: dict[int, list[dict]] = {}
+        for session in sessions:
+            sessions_by_project.setdefault(session['project_id'], []).append(session)
+
+        for session in sessions:
+            # Parse pending question JSON
+            session['pending_question_data'] = None
+            if session.get('pending_question') and session.get('has_active_pending'):
+                try:
+                    session['pending_question_data'] = json.loads(session['pending_question'])
+                except (json.JSONDecodeError, TypeError):
+                    pass
+
+        return [
+            {
+                'project': proj,
+                'last_activity': proj['last_activity'],
+                'has_pending': bool(proj.get('has_pending')),
+                'sessions': sessions_by_project[proj['id']]
+            }
+            for proj in projects_with_activity
+        ]
 
     def search_messages(
         self,
@@ -337,27 +398,35 @@ class QueryHelper:
         project_id: Optional[int] = None,
         limit: int = 50
     ) -> list[dict]:
-        """Search messages by content."""
-        # Simple search - could be enhanced with FTS
+        """Search messages by content (case-insensitive substring match).
+
+        Uses the messages_fts trigram index when the database has one.
+        """
+        if self.db.has_search_index:
+            source = "messages_fts f JOIN messages m ON m.id = f.rowid"
+            content = "f.content"
+        else:
+            source = "messages m"
+            content = "m.content"
         with self.db.connection() as conn:
             if project_id:
                 cursor = conn.execute(
-                    """SELECT m.*, s.session_id as session_uuid, p.name as project_name
-                       FROM messages m
+                    f"""SELECT m.*, s.session_id as session_uuid, p.name as project_name
+                       FROM {source}
                        JOIN sessions s ON m.session_id = s.id
                        JOIN projects p ON s.project_id = p.id
-                       WHERE m.content LIKE ? AND s.project_id = ?
+                       WHERE {content} LIKE ? AND s.project_id = ?
                        ORDER BY m.timestamp DESC
                        LIMIT ?""",
                     (f"%{query}%", project_id, limit)
                 )
             else:
                 cursor = conn.execute(
-                    """SELECT m.*, s.session_id as session_uuid, p.name as project_name
-                       FROM messages m
+                    f"""SELECT m.*, s.session_id as session_uuid, p.name as project_name
+                       FROM {source}
                        JOIN sessions s ON m.session_id = s.id
                        LEFT JOIN projects p ON s.project_id = p.id
-                       WHERE m.content LIKE ?
+                       WHERE {content} LIKE ?
                        ORDER BY m.timestamp DESC
                        LIMIT ?""",
                     (f"%{query}%", limit)
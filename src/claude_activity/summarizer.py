@@ -1,15 +1,23 @@
 """Claude API summarization for activity logs."""
 
+import asyncio
+import hashlib
 import os
+import threading
 from datetime import datetime, date, timedelta
-from typing import Optional
+from string import Formatter
+from typing import Iterator, Optional
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 
 from .config import Config, get_config
 from .db import Database
 
 
+# Per-message character limit for user requests in daily summary prompts
+MAX_MESSAGE_CHARS = 300
+
+
 DAILY_SUMMARY_PROMPT = """Analyze these Claude Code user requests from {date} and provide a concise summary.
 
 The requests are grouped by project, showing what the user asked Claude to help with.
@@ -128,19 +136,66 @@ Write this summary as if briefing another developer (or Claude) who needs to pic
 """
 
 
+class _PromptTemplate:
+    """A prompt template split into literal text and fields once, at import.
+
+    Rendering is plain concatenation, so large conversation bodies are not
+    run through str.format on every call.
+    """
+
+    def __init__(self, template: str):
+        self._parts = [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+
+    def render(self, **fields) -> str:
+        # Literals and values are joined separately: literal + value would
+        # copy a large conversation body once more before the join.
+        parts = []
+        for literal, field in self._parts:
+            parts.append(literal)
+            if field is not None:
+                parts.append(str(fields[field]))
+        return "".join(parts)
+
+
+_DAILY_TEMPLATE = _PromptTemplate(DAILY_SUMMARY_PROMPT)
+_WEEKLY_TEMPLATE = _PromptTemplate(WEEKLY_SUMMARY_PROMPT)
+_MONTHLY_TEMPLATE = _PromptTemplate(MONTHLY_SUMMARY_PROMPT)
+_SESSION_CONTEXT_TEMPLATE = _PromptTemplate(SESSION_CONTEXT_PROMPT)
+
+
+# Process-wide API client, shared so its HTTP connection pool is reused
+_shared_client: Optional[Anthropic] = None
+_shared_client_lock = threading.Lock()
+
+
+def _get_client() -> Anthropic:
+    """Get the shared Anthropic client, creating it on first use."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = Anthropic()  # Uses ANTHROPIC_API_KEY env var
+        return _shared_client
+
+
 class Summarizer:
     """Generate summaries of Claude activity using the Claude API."""
 
     def __init__(self, config: Optional[Config] = None, db: Optional[Database] = None):
         self.config = config or get_config()
         self.db = db or Database(self.config)
-        self.client = Anthropic()  # Uses ANTHROPIC_API_KEY env var
+        self.client = _get_client()
 
-    def _format_messages_for_summary(self, messages: list[dict], max_total_chars: int = 50000) -> str:
+    def _format_messages_for_summary(
+        self,
+        messages: list[dict],
+        max_total_chars: int = 50000,
+        assistant_counts: Optional[dict[Optional[str], int]] = None
+    ) -> str:
         """Format messages for the summary prompt.
 
         Only includes user messages to save tokens - user prompts contain
-        enough context to understand what was worked on.
+        enough context to understand what was worked on. If assistant_counts
+        (project name -> count) is given, messages may contain user rows only.
         """
         # Group messages by project and session for better context
         by_project: dict[str, list[dict]] = {}
@@ -150,39 +205,52 @@ class Summarizer:
                 by_project[project] = []
             by_project[project].append(msg)
 
-        formatted = []
+        formatted = "\n".join(self._iter_summary_lines(by_project, max_total_chars, assistant_counts))
+        return formatted if formatted else "No conversations recorded."
+
+    def _iter_summary_lines(
+        self,
+        by_project: dict[str, list[dict]],
+        max_total_chars: int,
+        assistant_counts: Optional[dict[Optional[str], int]] = None
+    ) -> Iterator[str]:
+        """Yield prompt lines per project, stopping once max_total_chars is used up."""
         total_chars = 0
 
         for project, proj_messages in by_project.items():
             user_messages = [m for m in proj_messages if m.get('role') == 'user']
-            assistant_count = len([m for m in proj_messages if m.get('role') == 'assistant'])
+            if assistant_counts is not None:
+                assistant_count = assistant_counts.get(project, 0)
+            else:
+                assistant_count = len([m for m in proj_messages if m.get('role') == 'assistant'])
 
             if not user_messages:
                 continue
 
-            formatted.append(f"## Project: {project}")
-            formatted.append(f"({len(user_messages)} requests, {assistant_count} responses)")
+            yield f"## Project: {project}"
+            yield f"({len(user_messages)} requests, {assistant_count} responses)"
 
+            # Collapse repeated identical requests ("continue", "run the tests")
+            # into one line at their first position, with a repeat count
+            repeats: dict[str, int] = {}
             for msg in user_messages:
                 content = msg.get('content') or ''
-                # Aggressive truncation for individual messages
-                if len(content) > 300:
-                    content = content[:300] + "..."
-
-                # Check total limit
+                # Aggressive truncation for individual messages (rows from
+                # get_messages_in_range_truncated arrive already cut)
+                if msg.get('truncated') or len(content) > MAX_MESSAGE_CHARS:
+                    content = content[:MAX_MESSAGE_CHARS] + "..."
+                repeats[content] = repeats.get(content, 0) + 1
+
+            for content, count in repeats.items():
+                # Budget exhausted: stop across all projects, not just this one
                 if total_chars + len(content) > max_total_chars:
-                    formatted.append("... (truncated due to length)")
-                    break
+                    yield "... (truncated due to length)"
+                    return
 
-                formatted.append(f"- {content}")
+                yield f"- {content}" if count == 1 else f"- {content}  (×{count})"
                 total_chars += len(content)
 
-            if total_chars > max_total_chars:
-                break
-
-            formatted.append("")  # Blank line between projects
-
-        return "\n".join(formatted) if formatted else "No conversations recorded."
+            yield ""  # Blank line between projects
 
     def _call_claude(self, prompt: str) -> str:
         """Call Claude API to generate summary."""
@@ -195,47 +263,91 @@ class Summarizer:
         )
         return response.content[0].text
 
+    async def _stream_claude(self, client: AsyncAnthropic, prompt: str) -> str:
+        """Call Claude API with a streaming response and return the full text."""
+        async with client.messages.stream(
+            model=self.config.summarizer.model,
+            max_tokens=2000,
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            return await stream.get_final_text()
+
+    def _prompt_hash(self, prompt: str) -> str:
+        """Hash a prompt together with the model it is sent to."""
+        return hashlib.sha256(f"{self.config.summarizer.model}\n{prompt}".encode()).hexdigest()
+
+    @staticmethod
+    def _is_unchanged(existing: Optional[dict], prompt_hash: Optional[str], force: bool) -> bool:
+        """Whether an existing summary can be returned instead of regenerating.
+
+        Forced runs always regenerate. Otherwise the stored summary is kept
+        unless it was generated from a different prompt or model; summaries
+        saved without a hash, or with no input to compare, are kept as well.
+        """
+        if force or not existing:
+            return False
+        stored_hash = existing.get('prompt_hash')
+        return stored_hash is None or prompt_hash is None or stored_hash == prompt_hash
+
+    def _build_daily_prompt(
+        self,
+        target_date: date,
+        project_id: Optional[int] = None,
+        messages: Optional[list[dict]] = None
+    ) -> Optional[str]:
+        """Build the daily summary prompt for a date, or None if there is no data."""
+        # Get messages for the date: user requests only, assistant replies are just counted
+        assistant_counts = None
+        if messages is None:
+            start = datetime.combine(target_date, datetime.min.time())
+            end = datetime.combine(target_date + timedelta(days=1), datetime.min.time())
+            messages, assistant_counts = self.db.get_user_messages_and_assistant_counts(
+                start, end, project_id, limit_chars=MAX_MESSAGE_CHARS
+            )
+            if not messages and not assistant_counts:
+                return None
+        else:
+            # Filter to user/assistant messages only
+            messages = [m for m in messages if m.get('role') in ('user', 'assistant')]
+            if not messages:
+                return None
+
+        conversations = self._format_messages_for_summary(messages, assistant_counts=assistant_counts)
+        return _DAILY_TEMPLATE.render(
+            date=target_date.strftime("%Y-%m-%d"),
+            conversations=conversations
+        )
+
     def generate_daily_summary(
         self,
         target_date: date,
         project_id: Optional[int] = None,
-        force: bool = False
+        force: bool = False,
+        messages: Optional[list[dict]] = None
     ) -> Optional[str]:
         """Generate a daily summary for a specific date.
 
         Args:
             target_date: The date to summarize
             project_id: Optional project filter
-            force: If True, regenerate even if summary exists
+            force: If True, regenerate even if an up-to-date summary exists
+            messages: Pre-fetched messages for the date (queried if not given)
 
         Returns:
             The generated summary, or None if no data
         """
-        # Check if summary already exists
-        if not force:
-            existing = self.db.get_summary('daily', target_date, project_id)
-            if existing:
-                return existing['summary']
-
-        # Get messages for the date
-        start = datetime.combine(target_date, datetime.min.time())
-        end = datetime.combine(target_date + timedelta(days=1), datetime.min.time())
-
-        messages = self.db.get_messages_in_range(start, end, project_id)
-
-        # Filter to user/assistant messages only
-        messages = [m for m in messages if m.get('role') in ('user', 'assistant')]
-
-        if not messages:
+        existing = self.db.get_summary('daily', target_date, project_id)
+        prompt = self._build_daily_prompt(target_date, project_id, messages)
+        prompt_hash = self._prompt_hash(prompt) if prompt is not None else None
+
+        # Reuse the existing summary unless forced or its input has changed
+        if self._is_unchanged(existing, prompt_hash, force):
+            return existing['summary']
+        if prompt is None:
             return None
 
-        # Format and generate summary
-        conversations = self._format_messages_for_summary(messages)
-        prompt = DAILY_SUMMARY_PROMPT.format(
-            date=target_date.strftime("%Y-%m-%d"),
-            conversations=conversations
-        )
-
         summary = self._call_claude(prompt)
 
         # Save summary
@@ -244,7 +356,8 @@ class Summarizer:
             period_start=target_date,
             period_end=target_date,
             summary=summary,
-            project_id=project_id
+            project_id=project_id,
+            prompt_hash=prompt_hash
         )
 
         return summary
@@ -260,30 +373,30 @@ class Summarizer:
         Args:
             week_start: The Monday of the week to summarize
             project_id: Optional project filter
-            force: If True, regenerate even if summary exists
+            force: If True, regenerate even if an up-to-date summary exists
 
         Returns:
             The generated summary, or None if no data
         """
         week_end = week_start + timedelta(days=6)
 
-        # Check if summary already exists
-        if not force:
-            existing = self.db.get_summary('weekly', week_start, project_id)
-            if existing:
-                return existing['summary']
+        existing = self.db.get_summary('weekly', week_start, project_id)
 
         # Get daily summaries for the week
         daily_summaries = self.db.get_summaries_in_range('daily', week_start, week_end, project_id)
 
         if not daily_summaries:
-            # Try to generate missing daily summaries first
+            # Nothing to compare an existing summary against
+            if self._is_unchanged(existing, None, force):
+                return existing['summary']
+            # Try to generate missing daily summaries first, collecting them
+            # directly instead of querying them back
             for i in range(7):
                 day = week_start + timedelta(days=i)
                 if day < date.today():  # Don't summarize future or today
-                    self.generate_daily_summary(day, project_id)
-
-            daily_summaries = self.db.get_summaries_in_range('daily', week_start, week_end, project_id)
+                    day_summary = self.generate_daily_summary(day, project_id)
+                    if day_summary:
+                        daily_summaries.append({'period_start': day, 'summary': day_summary})
 
         if not daily_summaries:
             return None
@@ -293,12 +406,17 @@ class Summarizer:
         for ds in daily_summaries:
             formatted.append(f"### {ds['period_start']}\n{ds['summary']}")
 
-        prompt = WEEKLY_SUMMARY_PROMPT.format(
+        prompt = _WEEKLY_TEMPLATE.render(
             start_date=week_start.strftime("%Y-%m-%d"),
             end_date=week_end.strftime("%Y-%m-%d"),
             daily_summaries="\n\n".join(formatted)
         )
 
+        # Reuse the existing summary unless forced or its input has changed
+        prompt_hash = self._prompt_hash(prompt)
+        if self._is_unchanged(existing, prompt_hash, force):
+            return existing['summary']
+
         summary = self._call_claude(prompt)
 
         # Save summary
@@ -307,7 +425,8 @@ class Summarizer:
             period_start=week_start,
             period_end=week_end,
             summary=summary,
-            project_id=project_id
+            project_id=project_id,
+            prompt_hash=prompt_hash
         )
 
         return summary
@@ -325,7 +444,7 @@ class Summarizer:
             year: Year
             month: Month (1-12)
             project_id: Optional project filter
-            force: If True, regenerate even if summary exists
+            force: If True, regenerate even if an up-to-date summary exists
 
         Returns:
             The generated summary, or None if no data
@@ -336,27 +455,27 @@ class Summarizer:
         else:
             month_end = date(year, month + 1, 1) - timedelta(days=1)
 
-        # Check if summary already exists
-        if not force:
-            existing = self.db.get_summary('monthly', month_start, project_id)
-            if existing:
-                return existing['summary']
+        existing = self.db.get_summary('monthly', month_start, project_id)
 
         # Get weekly summaries for the month
         weekly_summaries = self.db.get_summaries_in_range('weekly', month_start, month_end, project_id)
 
         if not weekly_summaries:
-            # Try to generate missing weekly summaries
+            # Nothing to compare an existing summary against
+            if self._is_unchanged(existing, None, force):
+                return existing['summary']
+            # Try to generate missing weekly summaries, collecting the ones
+            # that start within the month (as the range query would)
             current = month_start
             while current <= month_end:
                 # Find Monday of this week
                 monday = current - timedelta(days=current.weekday())
                 if monday >= month_start - timedelta(days=6):  # Include partial weeks
-                    self.generate_weekly_summary(monday, project_id)
+                    week_summary = self.generate_weekly_summary(monday, project_id)
+                    if week_summary and month_start <= monday <= month_end:
+                        weekly_summaries.append({'period_start': monday, 'summary': week_summary})
                 current += timedelta(days=7)
 
-            weekly_summaries = self.db.get_summaries_in_range('weekly', month_start, month_end, project_id)
-
         if not weekly_summaries:
             return None
 
@@ -366,12 +485,17 @@ class Summarizer:
             formatted.append(f"### Week of {ws['period_start']}\n{ws['summary']}")
 
         month_name = month_start.strftime("%B")
-        prompt = MONTHLY_SUMMARY_PROMPT.format(
+        prompt = _MONTHLY_TEMPLATE.render(
             month_name=month_name,
             year=year,
             weekly_summaries="\n\n".join(formatted)
         )
 
+        # Reuse the existing summary unless forced or its input has changed
+        prompt_hash = self._prompt_hash(prompt)
+        if self._is_unchanged(existing, prompt_hash, force):
+            return existing['summary']
+
         summary = self._call_claude(prompt)
 
         # Save summary
@@ -380,28 +504,109 @@ class Summarizer:
             period_start=month_start,
             period_end=month_end,
             summary=summary,
-            project_id=project_id
+            project_id=project_id,
+            prompt_hash=prompt_hash
         )
 
         return summary
 
+    async def _generate_daily_summaries_streaming(
+        self,
+        days: list[date],
+        project_id: Optional[int],
+        force: bool,
+        messages_by_day: dict[date, list[dict]],
+        concurrency: int
+    ) -> int:
+        """Generate daily summaries with up to `concurrency` API calls in flight.
+
+        Each summary is saved as soon as its response completes, while the
+        remaining requests keep streaming.
+
+        Returns:
+            Number of daily summaries available afterwards
+        """
+        client = AsyncAnthropic()
+        semaphore = asyncio.Semaphore(concurrency)
+        count = 0
+
+        async def summarize_day(day: date, prompt: str, prompt_hash: str):
+            async with semaphore:
+                try:
+                    return day, prompt_hash, await self._stream_claude(client, prompt)
+                except Exception as e:
+                    print(f"Error summarizing {day}: {e}")
+                    return day, prompt_hash, None
+
+        pending = []
+        for day in days:
+            existing = self.db.get_summary('daily', day, project_id)
+            prompt = self._build_daily_prompt(day, project_id, messages_by_day.get(day, []))
+            prompt_hash = self._prompt_hash(prompt) if prompt is not None else None
+            if self._is_unchanged(existing, prompt_hash, force):
+                count += 1
+                continue
+            if prompt is None:
+                continue
+            pending.append(summarize_day(day, prompt, prompt_hash))
+
+        try:
+            for next_done in asyncio.as_completed(pending):
+                day, prompt_hash, summary = await next_done
+                if not summary:
+                    continue
+                await asyncio.to_thread(
+                    self.db.save_summary,
+                    period_type='daily',
+                    period_start=day,
+                    period_end=day,
+                    summary=summary,
+                    project_id=project_id,
+                    prompt_hash=prompt_hash
+                )
+                count += 1
+        finally:
+            await client.close()
+
+        return count
+
     def summarize_unsummarized(
         self,
         project_id: Optional[int] = None,
-        force: bool = False
+        force: bool = False,
+        concurrency: int = 1
     ) -> dict:
         """Generate summaries for all unsummarized periods.
 
+        Args:
+            project_id: Optional project filter
+            force: If True, regenerate even if summaries exist
+            concurrency: Number of daily summaries to request in parallel;
+                above 1, responses are streamed and saved as they complete
+
         Returns:
             Dict with counts of generated summaries
         """
         results = {'daily': 0, 'weekly': 0, 'monthly': 0}
 
-        # Generate missing daily summaries
+        # Generate missing daily summaries, fetching all their messages in one query
         unsummarized_days = self.db.get_unsummarized_days(project_id)
+        messages_by_day = {}
+        if unsummarized_days:
+            messages_by_day = self.db.get_messages_bucketed_by_date(
+                unsummarized_days[0], unsummarized_days[-1], project_id,
+                limit_chars=MAX_MESSAGE_CHARS
+            )
+        if concurrency > 1 and unsummarized_days:
+            results['daily'] = asyncio.run(self._generate_daily_summaries_streaming(
+                unsummarized_days, project_id, force, messages_by_day, concurrency
+            ))
+            unsummarized_days = []
         for day in unsummarized_days:
             try:
-                summary = self.generate_daily_summary(day, project_id, force)
+                summary = self.generate_daily_summary(
+                    day, project_id, force, messages=messages_by_day.get(day, [])
+                )
                 if summary:
                     results['daily'] += 1
             except Exception as e:
@@ -439,17 +644,11 @@ class Summarizer:
             The context summary, or None if session not found
         """
         # Find session by prefix
-        with self.db.connection() as conn:
-            cursor = conn.execute(
-                "SELECT id, session_id, project_id, git_branch, started_at FROM sessions WHERE session_id LIKE ?",
-                (f"{session_id}%",)
-            )
-            session = cursor.fetchone()
-
+        full_session_id = self.db.find_session_id(session_id)
+        session = self.db.get_session(full_session_id) if full_session_id else None
         if not session:
             return None
 
-        session = dict(session)
         session_db_id = session['id']
 
         # Get project info
@@ -459,25 +658,10 @@ class Summarizer:
             if project:
                 project_name = project.get('name') or project.get('path') or "Unknown"
 
-        # Get all messages for this session
-        messages = self.db.get_messages_for_session(session_db_id)
-
-        # Filter to user/assistant messages only, skip tool-only messages
-        filtered_messages = []
-        for msg in messages:
-            role = msg.get('role')
-            content = msg.get('content') or ''
-
-            if role not in ('user', 'assistant'):
-                continue
-
-            content_stripped = content.strip()
-            if not content_stripped:
-                continue
-            if content_stripped.startswith('[Tool:') or content_stripped == '[Tool Result]':
-                continue
-
-            filtered_messages.append(msg)
+        # Get the messages with text, skipping empty and tool-only ones,
+        # and keep user/assistant messages only
+        messages = self.db.get_messages_for_session(session_db_id, exclude_tools=True)
+        filtered_messages = [msg for msg in messages if msg['role'] in ('user', 'assistant')]
 
         if not filtered_messages:
             return None
@@ -509,13 +693,19 @@ class Summarizer:
             session_date = str(session_date) if session_date else "Unknown"
 
         # Generate the context summary
-        prompt = SESSION_CONTEXT_PROMPT.format(
+        prompt = _SESSION_CONTEXT_TEMPLATE.render(
             project_name=project_name,
             git_branch=session.get('git_branch') or "Unknown",
             session_date=session_date,
             conversation=conversation
         )
 
+        # Skip the API call if this exact prompt was already summarized
+        content_hash = hashlib.sha256(prompt.encode()).hexdigest()
+        cached = self.db.get_cached_session_context(session_db_id, content_hash)
+        if cached is not None:
+            return cached
+
         # Use a larger model for better context extraction if available
         response = self.client.messages.create(
             model="claude-sonnet-4-20250514",  # Use Sonnet for better quality
@@ -525,4 +715,6 @@ class Summarizer:
             ]
         )
 
-        return response.content[0].text
+        context = response.content[0].text
+        self.db.save_session_context(session_db_id, content_hash, context)
+        return context
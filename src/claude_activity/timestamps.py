@@ -89,7 +89,8 @@ def get_local_offset() -> timedelta:
     """
     local_now = datetime.now()
     utc_now_time = datetime.now(timezone.utc).replace(tzinfo=None)
-    return local_now - utc_now_time
+    # The two clock reads are microseconds apart; offsets are whole minutes
+    return timedelta(minutes=round((local_now - utc_now_time).total_seconds() / 60))
 
 
 def utc_to_local(dt: datetime) -> datetime:
@@ -159,6 +160,15 @@ def parse_timestamp(ts: Any) -> datetime:
         - Microseconds in ISO strings
         - Missing timezone (assumes UTC)
     """
+    # Strings come first: every JSONL message has an ISO timestamp
+    if type(ts) is str:
+        # Fast path: fromisoformat takes 'Z', offsets and over-long
+        # fractions itself (Python 3.11+), as well as the SQLite format
+        try:
+            return to_utc(datetime.fromisoformat(ts))
+        except ValueError:
+            pass
+
     if ts is None:
         return utc_now()
 
@@ -172,7 +182,7 @@ def parse_timestamp(ts: Any) -> datetime:
         return datetime.utcfromtimestamp(ts)
 
     if isinstance(ts, str):
-        # ISO format string
+        # ISO format string needing normalization
         try:
             # Handle 'Z' suffix
             ts_str = ts.replace('Z', '+00:00')
@@ -243,11 +253,12 @@ def format_local_date(dt: datetime, fmt: str = '%Y-%m-%d') -> str:
     return utc_to_local(dt).strftime(fmt)
 
 
-def timeago(dt: datetime) -> str:
+def timeago(dt: datetime, now: Optional[datetime] = None) -> str:
     """Format a UTC datetime as a relative time string.
 
     Args:
         dt: Naive datetime in UTC
+        now: Current UTC time to measure from (default: utc_now())
 
     Returns:
         Human-readable relative time (e.g., "5m ago", "2h ago", "3d ago")
@@ -255,8 +266,7 @@ def timeago(dt: datetime) -> str:
     if dt is None:
         return ''
 
-    now = utc_now()
-    diff = now - dt
+    diff = (now or utc_now()) - dt
 
     if diff.days > 30:
         return utc_to_local(dt).strftime('%b %d, %Y')
@@ -268,3 +278,13 @@ def timeago(dt: datetime) -> str:
         return f"{diff.seconds // 60}m ago"
     else:
         return "just now"
+
+
+def format_local_time_many(dts: list[Optional[datetime]], fmt: str = '%Y-%m-%d %H:%M:%S') -> list[str]:
+    """Format a list of UTC datetimes as local time strings.
+
+    Same output as calling format_local_time() on each, with the local
+    offset looked up once for the whole list.
+    """
+    offset = get_local_offset()
+    return ['' if dt is None else (dt + offset).strftime(fmt) for dt in dts]
@@ -1,12 +1,17 @@
 """File watcher daemon for Claude session files."""
 
+import hashlib
 import logging
 import signal
 import sys
 import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from itertools import islice
+from operator import attrgetter
 from pathlib import Path
-from threading import Event, Thread
-from typing import Optional
+from threading import Condition, Event, Lock, Thread, current_thread, get_ident, main_thread
+from typing import Callable, Iterator, Optional
 import os
 
 from watchdog.observers import Observer
@@ -21,6 +26,7 @@ from .parser import (
     extract_project_info,
     extract_pending_question_from_raw_messages
 )
+from .inotify_observer import INOTIFY_AVAILABLE, InotifyObserver
 from .cursor_parser import (
     parse_cursor_session_file,
     get_cursor_session_id_from_path,
@@ -32,136 +38,393 @@ from .cursor_parser import (
 
 logger = logging.getLogger(__name__)
 
+# Most files whose last-seen stat (and, for Cursor, content hash) a handler
+# remembers between events
+MAX_TRACKED_HASHES = 4096
+
+# Session file messages parsed per write job; bounds the time the write lock is held
+WRITE_BATCH_SIZE = 500
+
+# ParsedMessage fields in the row order insert_messages_bulk expects
+_message_row = attrgetter('uuid', 'type', 'role', 'content', 'model', 'timestamp', 'tokens_in', 'tokens_out')
+
+# Signals that stop the daemon; SIGUSR1 is how stop() wakes the waiting thread
+_CAN_SIGWAIT = hasattr(signal, 'sigwait') and hasattr(signal, 'SIGUSR1')
+_STOP_SIGNALS = {signal.SIGINT, signal.SIGTERM, signal.SIGUSR1} if _CAN_SIGWAIT else set()
+
+# Subagent transcripts live in .../session-id/subagents/agent-*.jsonl
+_SUBAGENTS_DIR = f"{os.sep}subagents{os.sep}"
+
+
+def _hash_file(path: Path, chunk_size: int = 65536) -> bytes:
+    """Hash a file's raw bytes in chunks, without loading it into memory."""
+    h = hashlib.blake2b(digest_size=16)
+    with path.open('rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.digest()
+
+
+def _scan_files(root: Path, suffixes: tuple[str, ...], skip_dirs: tuple[str, ...] = ()) -> Iterator[os.DirEntry]:
+    """Recursively yield files under root whose names end with one of suffixes.
+
+    Uses os.scandir with an explicit stack: entries carry their cached type
+    and stat, and no Path objects are built for files that are skipped.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip_dirs:
+                            stack.append(entry.path)
+                    elif entry.name.endswith(suffixes):
+                        yield entry
+        except OSError as e:
+            logger.warning(f"Could not scan {root}: {e}")
+
+
+class _IdCache:
+    """Remember database IDs of the sessions a handler has written.
+
+    Saves the get-or-create round trip on every event for files that are
+    already known. IDs are only added once they are known to be committed,
+    so a rolled-back insert never leaves a dangling ID behind.
+    """
+
+    def __init__(self, max_sessions: int = 4096):
+        self._lock = Lock()
+        self._sessions: OrderedDict[str, int] = OrderedDict()
+        self._max_sessions = max_sessions
+
+    def session(self, session_uuid: str) -> Optional[int]:
+        with self._lock:
+            session_db_id = self._sessions.get(session_uuid)
+            if session_db_id is not None:
+                self._sessions.move_to_end(session_uuid)
+            return session_db_id
+
+    def remember(self, session_uuid: str, session_db_id: int):
+        with self._lock:
+            self._sessions[session_uuid] = session_db_id
+            self._sessions.move_to_end(session_uuid)
+            if len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+
+
+class _InFlight:
+    """Track files being processed so each is handled by one thread at a time.
+
+    A request for a file that is already being processed is not dropped: the
+    processing thread runs the file again once it finishes, so content
+    appended mid-pass is not left waiting for the next event.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._active: set[str] = set()
+        self._rerun: set[str] = set()
+
+    def claim(self, path_str: str) -> bool:
+        """Claim a file for processing; False if another thread has it."""
+        with self._lock:
+            if path_str in self._active:
+                self._rerun.add(path_str)
+                return False
+            self._active.add(path_str)
+            return True
+
+    def finish(self, path_str: str) -> bool:
+        """Release a claimed file; True if it was requested again meanwhile."""
+        with self._lock:
+            if path_str in self._rerun:
+                self._rerun.discard(path_str)
+                return True
+            self._active.discard(path_str)
+            return False
+
+
+class _Debouncer:
+    """Coalesce bursts of events per file into one callback after a short delay.
+
+    The deadline is set by the first event of a burst and not pushed back by
+    later ones, so a file that is written continuously is still processed
+    at most once per delay.
+    """
+
+    def __init__(self, callback: Callable[[str], None], delay: float = 0.25):
+        self._callback = callback
+        self._delay = delay
+        self._pending: dict[str, float] = {}  # path -> deadline (monotonic)
+        self._cv = Condition()
+        self._thread: Optional[Thread] = None
+        self._stopped = False
+
+    def schedule(self, path_str: str):
+        with self._cv:
+            if self._stopped:
+                return
+            self._pending.setdefault(path_str, time.monotonic() + self._delay)
+            if self._thread is None:
+                self._thread = Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def stop(self):
+        """Stop scheduling callbacks, waiting for one in progress to finish."""
+        with self._cv:
+            self._stopped = True
+            self._cv.notify()
+            thread = self._thread
+        if thread is not None and thread is not current_thread():
+            thread.join()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if self._stopped:
+                        return
+                    if not self._pending:
+                        self._cv.wait()
+                        continue
+                    path_str, deadline = min(self._pending.items(), key=lambda item: item[1])
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        del self._pending[path_str]
+                        break
+                    self._cv.wait(remaining)
+            self._callback(path_str)
+
+
+def _is_claude_session_path(path_str: str) -> bool:
+    return path_str.endswith('.jsonl') and _SUBAGENTS_DIR not in path_str
+
+
+def _is_cursor_transcript_path(path_str: str) -> bool:
+    # Cheap string checks first; confirm with the exact check only for candidates
+    return (
+        path_str.endswith(('.txt', '.json'))
+        and 'agent-transcripts' in path_str
+        and is_cursor_transcript_file(Path(path_str))
+    )
 
-class SessionFileHandler(FileSystemEventHandler):
-    """Handle changes to Claude session JSONL files."""
+
+@dataclass(frozen=True)
+class SourceAdapter:
+    """The source-specific pieces of handling one tool's transcript files."""
+    source: str  # Value stored in sessions.source
+    label: str  # Prefix for file names in log messages
+    accepts: Callable[[str], bool]  # Filter for event paths (plain strings)
+    session_id_from_path: Callable[[Path], str]
+    project_path_from_file: Callable[[Path], Optional[str]]
+    project_info: Callable[[str], tuple[str, Optional[str]]]
+
+
+CLAUDE_CODE_SOURCE = SourceAdapter(
+    source='claude_code',
+    label='',
+    accepts=_is_claude_session_path,
+    session_id_from_path=get_session_id_from_path,
+    project_path_from_file=get_project_path_from_file,
+    project_info=extract_project_info,
+)
+
+CURSOR_SOURCE = SourceAdapter(
+    source='cursor',
+    label='Cursor file ',
+    accepts=_is_cursor_transcript_path,
+    # Prefix with 'cursor-' to avoid ID collisions with Claude Code sessions
+    session_id_from_path=lambda file_path: f"cursor-{get_cursor_session_id_from_path(file_path)}",
+    project_path_from_file=get_cursor_project_path_from_file,
+    project_info=extract_cursor_project_info,
+)
+
+
+class SourceFileHandler(FileSystemEventHandler):
+    """Event handling shared by all transcript sources.
+
+    Filters and debounces events, keeps each file on one thread at a time
+    and caches project/session IDs. Subclasses set `adapter` and implement
+    _do_process for their file format.
+    """
+
+    adapter: SourceAdapter
 
     def __init__(self, db: Database, config: Config):
         super().__init__()
         self.db = db
         self.config = config
-        self._processing = set()
-
-    def _is_subagent_file(self, file_path: Path) -> bool:
-        """Check if file is a subagent transcript (should be skipped)."""
-        # Subagent files are in: .../session-id/subagents/agent-*.jsonl
-        return 'subagents' in file_path.parts
+        self._processing = _InFlight()
+        self._ids = _IdCache()
+        self._debouncer = _Debouncer(lambda path_str: self._process_file(Path(path_str)))
 
     def on_created(self, event):
-        if not event.is_directory and event.src_path.endswith('.jsonl'):
-            file_path = Path(event.src_path)
-            if not self._is_subagent_file(file_path):
-                self._process_file(file_path)
+        self._on_event(event)
 
     def on_modified(self, event):
-        if not event.is_directory and event.src_path.endswith('.jsonl'):
-            file_path = Path(event.src_path)
-            if not self._is_subagent_file(file_path):
-                self._process_file(file_path)
+        self._on_event(event)
+
+    def _on_event(self, event):
+        # Filter on the raw path string; Path objects are only built once per debounced burst
+        if not event.is_directory and self.adapter.accepts(event.src_path):
+            self._debouncer.schedule(event.src_path)
+
+    def stop(self):
+        """Stop processing queued events, waiting for the current file to finish."""
+        self._debouncer.stop()
 
     def _process_file(self, file_path: Path):
-        """Process a session file, reading only new content."""
+        """Process a transcript file, serializing work on the same file."""
         path_str = str(file_path)
 
         # Avoid concurrent processing of same file
-        if path_str in self._processing:
+        if not self._processing.claim(path_str):
             return
 
-        self._processing.add(path_str)
-        try:
-            self._do_process(file_path)
-        except Exception as e:
-            logger.error(f"Error processing {file_path}: {e}")
-        finally:
-            self._processing.discard(path_str)
+        while True:
+            try:
+                self._do_process(file_path)
+            except Exception as e:
+                logger.error(f"Error processing {self.adapter.label}{file_path}: {e}")
+            if not self._processing.finish(path_str):
+                break
+
+    def _get_session_id(
+        self,
+        project_path: str,
+        session_uuid: str,
+        git_branch: Optional[str] = None
+    ) -> int:
+        """Get or create the project and session, using the cached ID when known.
+
+        Call inside the write job; remember the ID once the job has committed.
+        """
+        session_db_id = self._ids.session(session_uuid)
+        if session_db_id is None:
+            name, org = self.adapter.project_info(project_path)
+            _, session_db_id = self.db.get_or_create_project_and_session(
+                project_path, name, org, session_uuid, source=self.adapter.source, git_branch=git_branch
+            )
+        return session_db_id
+
+    def _do_process(self, file_path: Path):
+        raise NotImplementedError
+
+
+class SessionFileHandler(SourceFileHandler):
+    """Handle changes to Claude session JSONL files."""
+
+    adapter = CLAUDE_CODE_SOURCE
+
+    def __init__(self, db: Database, config: Config):
+        super().__init__(db, config)
+        # path -> (size, mtime_ns) when last processed, least recent first
+        self._last_stat: OrderedDict[str, tuple[int, int]] = OrderedDict()
+        self._stat_lock = Lock()
+
+    def _stat_unchanged(self, path_str: str, stat_key: tuple[int, int]) -> bool:
+        with self._stat_lock:
+            if self._last_stat.get(path_str) != stat_key:
+                return False
+            self._last_stat.move_to_end(path_str)
+            return True
+
+    def _remember_stat(self, path_str: str, stat_key: tuple[int, int]):
+        with self._stat_lock:
+            self._last_stat[path_str] = stat_key
+            self._last_stat.move_to_end(path_str)
+            while len(self._last_stat) > MAX_TRACKED_HASHES:
+                self._last_stat.popitem(last=False)
 
     def _do_process(self, file_path: Path):
         """Actually process the file."""
         import json
 
-        if not file_path.exists():
+        path_str = str(file_path)
+        try:
+            st = file_path.stat()
+        except FileNotFoundError:
             return
 
-        # Get last read position
-        last_pos = self.db.get_last_position(str(file_path))
-
-        # Parse messages and collect them
-        messages_to_insert = []
-        raw_messages = []  # Keep raw data for pending question detection
-        project_path = None
-        git_branch = None
-        final_pos = last_pos
-
-        for message, end_pos in parse_session_file(file_path, last_pos):
-            messages_to_insert.append(message)
-            if message.raw_data:
-                raw_messages.append(message.raw_data)
-            # Extract project path from first message that has cwd
-            if project_path is None and message.cwd:
-                project_path = message.cwd
-            # Extract git branch from first message that has it
-            if git_branch is None and message.git_branch:
-                git_branch = message.git_branch
-            final_pos = end_pos
-
-        # If no cwd found in messages, fall back to directory name decoding
-        if not project_path:
-            project_path = get_project_path_from_file(file_path)
-            if not project_path:
-                logger.warning(f"Could not determine project path for {file_path}")
-                return
+        # Editors and Claude fire bursts of modify events; skip if nothing changed
+        stat_key = (st.st_size, st.st_mtime_ns)
+        if self._stat_unchanged(path_str, stat_key):
+            return
 
-        # Get or create project
-        name, org = extract_project_info(project_path)
-        project_id = self.db.get_or_create_project(project_path, name, org)
+        # Get last read position, and the session's ID if it is already recorded
+        session_uuid = self.adapter.session_id_from_path(file_path)
+        last_pos, known_session_db_id = self.db.get_file_state(path_str, session_uuid)
+        if known_session_db_id is not None:
+            self._ids.remember(session_uuid, known_session_db_id)
 
-        # Get or create session
-        session_uuid = get_session_id_from_path(file_path)
-        session_db_id = self.db.get_or_create_session(
-            session_uuid, project_id, git_branch=git_branch, source='claude_code'
-        )
+        # Session files are append-only, so no growth means nothing new to read
+        if st.st_size == last_pos:
+            self._remember_stat(path_str, stat_key)
+            return
 
-        # Insert messages (skip empty ones)
+        # Parse on this thread a batch at a time; each batch is committed in
+        # its own write job, so the writer only runs the inserts
+        messages = parse_session_file(file_path, last_pos)
+        project_path = None
+        git_branch = None
+        rows = []
+        end_pos = last_pos
         message_count = 0
-        first_timestamp = None
-        last_timestamp = None
 
-        for message in messages_to_insert:
-            # Skip messages with no meaningful content
-            if not message.content or not message.content.strip():
-                continue
+        def write_batch(batch_rows: list[tuple], batch_end: int, branch: Optional[str]) -> tuple[int, int]:
+            """Write a batch of messages, the position after it and session metadata."""
+            session_db_id = self._get_session_id(project_path, session_uuid, branch)
+            inserted = self.db.insert_messages_bulk(session_db_id, batch_rows)
 
-            result = self.db.insert_message(
-                session_db_id=session_db_id,
-                uuid=message.uuid,
-                msg_type=message.type,
-                role=message.role,
-                content=message.content,
-                model=message.model,
-                timestamp=message.timestamp,
-                tokens_in=message.tokens_in,
-                tokens_out=message.tokens_out
-            )
-            if result is not None:
-                message_count += 1
-                # Only use messages with role for session timing (skip system messages)
-                if message.role in ('user', 'assistant'):
-                    if first_timestamp is None:
-                        first_timestamp = message.timestamp
-                    last_timestamp = message.timestamp
-
-        # Update position tracker
-        if final_pos > last_pos:
-            self.db.update_position(str(file_path), final_pos)
-
-        # Update session metadata
-        if message_count > 0:
+            # Only use messages with role for session timing (skip system messages)
+            timed = [row['timestamp'] for row in inserted if row['role'] in ('user', 'assistant')]
+
+            if batch_end > last_pos:
+                self.db.update_position(path_str, batch_end)
+            # The branch may only show up after the session was created
             self.db.update_session(
                 session_uuid,
-                started_at=first_timestamp,
-                ended_at=last_timestamp,
-                message_count=message_count
+                started_at=timed[0] if timed else None,
+                ended_at=timed[-1] if timed else None,
+                message_count=len(inserted) or None,
+                git_branch=branch
             )
+            return len(inserted), session_db_id
+
+        for batch in iter(lambda: list(islice(messages, WRITE_BATCH_SIZE)), []):
+            for message, _ in batch:
+                # Extract project path from first message that has cwd
+                if project_path is None and message.cwd:
+                    project_path = message.cwd
+                # Extract git branch from first message that has it
+                if git_branch is None and message.git_branch:
+                    git_branch = message.git_branch
+                # Skip messages with no meaningful content
+                if message.content and message.content.strip():
+                    rows.append(_message_row(message))
+            end_pos = batch[-1][1]
+
+            # Keep buffering until a message tells us the project path
+            if project_path is None:
+                continue
+            count, session_db_id = self.db.run_write(write_batch, rows, end_pos, git_branch)
+            self._ids.remember(session_uuid, session_db_id)
+            message_count += count
+            rows = []
+
+        if project_path is None:
+            # If no cwd found in messages, fall back to directory name decoding
+            project_path = self.adapter.project_path_from_file(file_path)
+            if not project_path:
+                logger.warning(f"Could not determine project path for {file_path}")
+                return
+            count, session_db_id = self.db.run_write(write_batch, rows, end_pos, git_branch)
+            self._ids.remember(session_uuid, session_db_id)
+            message_count += count
+
+        if message_count > 0:
             logger.info(f"Processed {message_count} new messages from {file_path.name}")
 
         # Check for pending questions (need to read full file for context)
@@ -180,53 +443,34 @@ class SessionFileHandler(FileSystemEventHandler):
                 'header': pending_question.get('header'),
                 'tool_use_id': pending_question.get('tool_use_id', '')
             })
-            self.db.update_session_pending_question(
+            self.db.run_write(
+                self.db.update_session_pending_question,
                 session_uuid,
                 pending_question=question_json,
                 pending_question_time=pending_question.get('timestamp')
             )
         else:
             # Clear any existing pending question
-            self.db.update_session_pending_question(
+            self.db.run_write(
+                self.db.update_session_pending_question,
                 session_uuid,
                 pending_question=None,
                 pending_question_time=None
             )
 
+        self._remember_stat(path_str, stat_key)
 
-class CursorSessionFileHandler(FileSystemEventHandler):
-    """Handle changes to Cursor AI transcript files."""
-
-    def __init__(self, db: Database, config: Config):
-        super().__init__()
-        self.db = db
-        self.config = config
-        self._processing = set()
-        self._processed_hashes = {}  # Track file content hashes to detect changes
 
-    def on_created(self, event):
-        if not event.is_directory and is_cursor_transcript_file(Path(event.src_path)):
-            self._process_file(Path(event.src_path))
-
-    def on_modified(self, event):
-        if not event.is_directory and is_cursor_transcript_file(Path(event.src_path)):
-            self._process_file(Path(event.src_path))
-
-    def _process_file(self, file_path: Path):
-        """Process a Cursor transcript file."""
-        path_str = str(file_path)
+class CursorSessionFileHandler(SourceFileHandler):
+    """Handle changes to Cursor AI transcript files."""
 
-        # Avoid concurrent processing of same file
-        if path_str in self._processing:
-            return
+    adapter = CURSOR_SOURCE
 
-        self._processing.add(path_str)
-        try:
-            self._do_process(file_path)
-        except Exception as e:
-            logger.error(f"Error processing Cursor file {file_path}: {e}")
-        finally:
-            self._processing.discard(path_str)
+    def __init__(self, db: Database, config: Config):
+        super().__init__(db, config)
+        # path -> (mtime_ns, size, 16-byte content digest) to detect changes, least recent first
+        self._processed_hashes: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+        self._hashes_lock = Lock()
 
     def _do_process(self, file_path: Path):
         """Actually process the Cursor transcript file."""
@@ -235,68 +479,58 @@ class CursorSessionFileHandler(FileSystemEventHandler):
 
         path_str = str(file_path)
 
-        # Get or create project
-        project_path = get_cursor_project_path_from_file(file_path)
-        if not project_path:
-            logger.warning(f"Could not determine project path for Cursor file {file_path}")
-            return
-
-        name, org = extract_cursor_project_info(project_path)
-        project_id = self.db.get_or_create_project(project_path, name, org)
-
-        # Get or create session
-        session_uuid = get_cursor_session_id_from_path(file_path)
-        # Prefix with 'cursor-' to avoid ID collisions with Claude Code sessions
-        session_uuid = f"cursor-{session_uuid}"
-        session_db_id = self.db.get_or_create_session(session_uuid, project_id, source='cursor')
-
         # Check if file has changed since last processing
         # Cursor files are rewritten entirely, so we use content hash
         try:
-            content = file_path.read_text(encoding='utf-8', errors='replace')
-            import hashlib
-            content_hash = hashlib.md5(content.encode()).hexdigest()
-
-            last_hash = self._processed_hashes.get(path_str)
-            if last_hash == content_hash:
+            st = file_path.stat()
+            with self._hashes_lock:
+                last = self._processed_hashes.get(path_str)
+                if last:
+                    self._processed_hashes.move_to_end(path_str)
+            if last and last[:2] == (st.st_mtime_ns, st.st_size):
+                return  # Not touched since last processing
+            content_hash = _hash_file(file_path)
+            with self._hashes_lock:
+                self._processed_hashes[path_str] = (st.st_mtime_ns, st.st_size, content_hash)
+                while len(self._processed_hashes) > MAX_TRACKED_HASHES:
+                    self._processed_hashes.popitem(last=False)
+            if last and last[2] == content_hash:
                 return  # File hasn't changed
-
-            self._processed_hashes[path_str] = content_hash
-        except Exception as e:
+        except OSError as e:
             logger.error(f"Error reading Cursor file {file_path}: {e}")
             return
 
-        # Parse all messages (Cursor files are rewritten, not appended)
-        message_count = 0
-        first_timestamp = None
-        last_timestamp = None
-
-        for message in parse_cursor_session_file(file_path):
-            result = self.db.insert_message(
-                session_db_id=session_db_id,
-                uuid=message.uuid,
-                msg_type='message',  # Cursor doesn't have types like Claude
-                role=message.role,
-                content=message.content,
-                model=None,  # Cursor doesn't expose model in transcripts
-                timestamp=message.timestamp,
-                tokens_in=None,
-                tokens_out=None
-            )
-            if result is not None:
-                message_count += 1
-                if first_timestamp is None:
-                    first_timestamp = message.timestamp
-                last_timestamp = message.timestamp
+        project_path = self.adapter.project_path_from_file(file_path)
+        if not project_path:
+            logger.warning(f"Could not determine project path for Cursor file {file_path}")
+            return
 
-        # Update session metadata
+        session_uuid = self.adapter.session_id_from_path(file_path)
+
+        def write_file() -> tuple[int, int]:
+            session_db_id = self._get_session_id(project_path, session_uuid)
+
+            # Parse all messages (Cursor files are rewritten, not appended)
+            # Cursor doesn't have types like Claude, or expose model and tokens in transcripts
+            inserted = self.db.insert_messages_bulk(session_db_id, (
+                (m.uuid, 'message', m.role, m.content, None, m.timestamp, None, None)
+                for m in parse_cursor_session_file(file_path)
+            ))
+            message_count = len(inserted)
+
+            # Update session metadata
+            if message_count > 0:
+                self.db.update_session(
+                    session_uuid,
+                    started_at=inserted[0]['timestamp'],
+                    ended_at=inserted[-1]['timestamp'],
+                    message_count=message_count
+                )
+            return message_count, session_db_id
+
+        message_count, session_db_id = self.db.run_write(write_file)
+        self._ids.remember(session_uuid, session_db_id)
         if message_count > 0:
-            self.db.update_session(
-                session_uuid,
-                started_at=first_timestamp,
-                ended_at=last_timestamp,
-                message_count=message_count
-            )
             logger.info(f"Processed {message_count} messages from Cursor file {file_path.name}")
 
 
@@ -306,8 +540,11 @@ class Watcher:
     def __init__(self, config: Optional[Config] = None):
         self.config = config or get_config()
         self.db = Database(self.config)
-        self.observer: Optional[Observer] = None
+        self.observer: Optional[Observer | InotifyObserver] = None
+        self._handlers = []
         self._stop_event = Event()
+        self._signal_lock = Lock()
+        self._signal_waiter: Optional[int] = None  # Thread ident blocked in sigwait
 
     def start(self, blocking: bool = True):
         """Start the file watcher.
@@ -315,7 +552,14 @@ class Watcher:
         Args:
             blocking: If True, run until stopped. If False, start in background.
         """
-        self.observer = Observer()
+        if blocking and _CAN_SIGWAIT and current_thread() is main_thread():
+            # Block the stop signals before any thread starts so every thread
+            # inherits the mask and they are only ever taken by sigwait
+            signal.pthread_sigmask(signal.SIG_BLOCK, _STOP_SIGNALS)
+            self._signal_waiter = get_ident()
+
+        # inotify_simple (Linux) gives a leaner observer; watchdog covers everything else
+        self.observer = InotifyObserver() if INOTIFY_AVAILABLE else Observer()
 
         # Watch Claude Code projects
         claude_watch_path = self.config.watcher.claude_dir / "projects"
@@ -324,6 +568,7 @@ class Watcher:
             claude_watch_path.mkdir(parents=True, exist_ok=True)
 
         claude_handler = SessionFileHandler(self.db, self.config)
+        self._handlers.append(claude_handler)
         self.observer.schedule(claude_handler, str(claude_watch_path), recursive=True)
         logger.info(f"Started watching Claude Code: {claude_watch_path}")
 
@@ -332,11 +577,13 @@ class Watcher:
         cursor_handler = None
         if cursor_watch_path.exists():
             cursor_handler = CursorSessionFileHandler(self.db, self.config)
+            self._handlers.append(cursor_handler)
             self.observer.schedule(cursor_handler, str(cursor_watch_path), recursive=True)
             logger.info(f"Started watching Cursor: {cursor_watch_path}")
         else:
             logger.info(f"Cursor directory not found, skipping: {cursor_watch_path}")
 
+        self.db.start_writer()
         self.observer.start()
 
         # Process existing files on startup
@@ -348,30 +595,39 @@ class Watcher:
             self._run_until_stopped()
 
     def _process_existing_claude_files(self, watch_path: Path, handler: SessionFileHandler):
-        """Process any existing Claude session files on startup."""
-        for jsonl_file in watch_path.rglob("*.jsonl"):
-            # Skip subagent files - they're internal to Claude Code
-            if handler._is_subagent_file(jsonl_file):
-                continue
+        """Process any existing Claude session files on startup.
+
+        Files already read up to their current size are skipped using the
+        positions recorded in the database, without opening them.
+        """
+        tracked = self.db.list_tracked_paths()
+        # Skip subagent files - they're internal to Claude Code
+        for entry in _scan_files(watch_path, ('.jsonl',), skip_dirs=('subagents',)):
+            last_pos = tracked.get(entry.path)
             try:
-                handler._process_file(jsonl_file)
+                if last_pos is not None and entry.stat().st_size == last_pos:
+                    continue
+                handler._process_file(Path(entry.path))
             except Exception as e:
-                logger.error(f"Error processing existing Claude file {jsonl_file}: {e}")
+                logger.error(f"Error processing existing Claude file {entry.path}: {e}")
 
     def _process_existing_cursor_files(self, watch_path: Path, handler: CursorSessionFileHandler):
         """Process any existing Cursor transcript files on startup."""
-        for transcript_dir in watch_path.rglob("agent-transcripts"):
-            if not transcript_dir.is_dir():
+        for entry in _scan_files(watch_path, ('.txt', '.json')):
+            # Transcripts sit directly in an agent-transcripts directory
+            if os.path.basename(os.path.dirname(entry.path)) != 'agent-transcripts':
                 continue
-            for transcript_file in transcript_dir.iterdir():
-                if transcript_file.suffix in ('.txt', '.json'):
-                    try:
-                        handler._process_file(transcript_file)
-                    except Exception as e:
-                        logger.error(f"Error processing existing Cursor file {transcript_file}: {e}")
+            try:
+                handler._process_file(Path(entry.path))
+            except Exception as e:
+                logger.error(f"Error processing existing Cursor file {entry.path}: {e}")
 
     def _run_until_stopped(self):
         """Run the watcher until stop signal received."""
+        if self._signal_waiter is not None:
+            self._wait_for_stop_signal()
+            return
+
         # Set up signal handlers
         def signal_handler(signum, frame):
             logger.info("Received stop signal")
@@ -388,13 +644,41 @@ class Watcher:
         finally:
             self.stop()
 
+    def _wait_for_stop_signal(self):
+        """Sleep in sigwait until SIGINT/SIGTERM, or SIGUSR1 sent by stop().
+
+        Unlike polling the stop event, this never wakes while idle.
+        """
+        try:
+            if not self._stop_event.is_set():
+                signum = signal.sigwait(_STOP_SIGNALS)
+                if signum != signal.SIGUSR1:
+                    logger.info("Received stop signal")
+        finally:
+            with self._signal_lock:
+                self._signal_waiter = None
+            # Consume a wake-up that stop() sent after sigwait had returned
+            if signal.SIGUSR1 in signal.sigpending():
+                signal.sigwait({signal.SIGUSR1})
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, _STOP_SIGNALS)
+            self.stop()
+
     def stop(self):
         """Stop the file watcher."""
         self._stop_event.set()
+        with self._signal_lock:
+            if self._signal_waiter is not None and self._signal_waiter != get_ident():
+                signal.pthread_kill(self._signal_waiter, signal.SIGUSR1)
+                self._signal_waiter = None
         if self.observer:
             self.observer.stop()
             self.observer.join(timeout=5)
             self.observer = None
+        # Let in-flight callbacks finish their writes before the writer stops
+        for handler in self._handlers:
+            handler.stop()
+        self._handlers = []
+        self.db.stop_writer()
         logger.info("Watcher stopped")
 
     def is_running(self) -> bool:
@@ -3,20 +3,162 @@
 For timestamp handling conventions, see timestamps.py.
 """
 
+import hashlib
 import os
 import re
+import time
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Optional
 from markupsafe import Markup
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, g, make_response, render_template, stream_template, request, jsonify, redirect, url_for
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import FileSystemBytecodeCache
 
 from ..config import get_config
 from ..db import Database
 from ..queries import QueryHelper, get_week_range, get_month_range
 from ..summarizer import Summarizer
 from ..watcher import read_pid_file, is_process_running
-from ..timestamps import utc_to_local, utc_now, timeago as ts_timeago
+from ..timestamps import get_local_offset, utc_to_local, utc_now, timeago as ts_timeago
+
+# waitress serves requests on a thread pool; without it the Flask
+# development server is used.
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+# orjson serializes JSON responses faster; fall back to Flask's stdlib provider.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+
+# Threads serving web requests under waitress
+WEB_SERVER_THREADS = 8
+
+# How long a daemon status check is reused
+DAEMON_STATUS_SECONDS = 2
+
+# How long the rendered live activity feed is reused
+LIVE_ACTIVITY_SECONDS = 2
+
+# Characters of message content fetched to build a live feed preview
+LIVE_PREVIEW_SOURCE_CHARS = 400
+
+
+@lru_cache(maxsize=512)
+def _render_markdown(text: str) -> str:
+    """Convert markdown to HTML.
+
+    Cached because summaries and session context render the same stored
+    text on every page view.
+    """
+    # Convert markdown to HTML (simple implementation)
+    lines = text.split('\n')
+    html_lines = []
+    in_list = False
+
+    for line in lines:
+        stripped = line.strip()
+
+        # Headers
+        if stripped.startswith('## '):
+            if in_list:
+                html_lines.append('</ul>')
+                in_list = False
+            html_lines.append(f'<h2 class="text-lg font-semibold mt-4 mb-2 text-gray-900 dark:text-white">{stripped[3:]}</h2>')
+        elif stripped.startswith('### '):
+            if in_list:
+                html_lines.append('</ul>')
+                in_list = False
+            html_lines.append(f'<h3 class="text-base font-semibold mt-3 mb-2 text-gray-900 dark:text-white">{stripped[4:]}</h3>')
+        # Bullet points
+        elif stripped.startswith('- '):
+            if not in_list:
+                html_lines.append('<ul class="list-disc list-inside space-y-1 mb-3 text-gray-700 dark:text-gray-300">')
+                in_list = True
+            # Handle bold text in list items; the substring test is far
+            # cheaper than running the pattern over lines without any
+            item_text = stripped[2:]
+            if '**' in item_text:
+                item_text = _BOLD_RE.sub(r'<strong>\1</strong>', item_text)
+            html_lines.append(f'<li>{item_text}</li>')
+        # Empty line
+        elif not stripped:
+            if in_list:
+                html_lines.append('</ul>')
+                in_list = False
+            html_lines.append('<br>')
+        # Regular paragraph
+        else:
+            if in_list:
+                html_lines.append('</ul>')
+                in_list = False
+            # Handle bold text
+            para_text = stripped
+            if '**' in para_text:
+                para_text = _BOLD_RE.sub(r'<strong>\1</strong>', para_text)
+            html_lines.append(f'<p class="mb-2 text-gray-700 dark:text-gray-300">{para_text}</p>')
+
+    if in_list:
+        html_lines.append('</ul>')
+
+    return '\n'.join(html_lines)
+
+
+@lru_cache(maxsize=4096)
+def _live_preview(message_id: int, content: str) -> str:
+    """Get the first meaningful line of a message for the live feed.
+
+    Messages never change once stored, so each poll of the feed only
+    computes previews for new ones.
+    """
+    # Clean up content - remove tool markers, get first meaningful line
+    for line in content.split('\n'):
+        line = line.strip()
+        if line and not line.startswith('[Tool:') and line != '[Tool Result]':
+            preview = line[:150]
+            if len(line) > 150:
+                preview += '...'
+            return preview
+    return ''
+
+
+@lru_cache(maxsize=1)
+def _daemon_status_at(period: int) -> tuple[Optional[int], bool]:
+    pid = read_pid_file()
+    return pid, bool(pid and is_process_running(pid))
+
+
+def _daemon_status() -> tuple[Optional[int], bool]:
+    """Get the daemon PID and whether it is running.
+
+    Checked at most every DAEMON_STATUS_SECONDS: every page render and
+    every open tab's status poll asks, and the answer rarely changes.
+    """
+    return _daemon_status_at(int(time.monotonic()) // DAEMON_STATUS_SECONDS)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Keys are sorted and output is indented in debug mode, as with the
+    default provider. Dates and datetimes serialize as ISO 8601.
+    """
+
+    def dumps(self, obj, **kwargs) -> str:
+        option = orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 
 def create_app(config=None):
@@ -26,6 +168,20 @@ def create_app(config=None):
                 static_folder='static')
 
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+
+    # Keep every compiled template: the cache becomes a plain dict instead
+    # of an LRU that locks on each lookup by the HTMX polling partials.
+    # Compiled bytecode is also stored on disk (in a per-user temp
+    # directory), so a restarted server skips parsing and compiling.
+    # Must be set before the filters below create the Jinja environment.
+    # Templates are checked for edits only in debug mode (Flask's default).
+    app.jinja_options = {
+        **app.jinja_options,
+        'cache_size': -1,
+        'bytecode_cache': FileSystemBytecodeCache(),
+    }
 
     if config is None:
         config = get_config()
@@ -33,11 +189,49 @@ def create_app(config=None):
     # Store config for use in routes
     app.claude_config = config
 
+    # Shared by all requests; each request pins one connection (see get_db),
+    # taken from a pool so requests don't reopen the database file
+    database = Database(config, pool_size=min(32, (os.cpu_count() or 1) * 4))
+    app.db = database
+
+    def get_db() -> Database:
+        """Return the app's Database with a connection pinned for this request."""
+        if 'db' not in g:
+            database.pin_connection()
+            g.db = database
+        return g.db
+
+    def get_helper() -> QueryHelper:
+        """Return a QueryHelper sharing the request's database connection."""
+        if 'helper' not in g:
+            g.helper = QueryHelper(config, get_db())
+        return g.helper
+
+    @app.teardown_appcontext
+    def close_db(exc):
+        if g.pop('db', None) is not None:
+            database.unpin_connection()
+
+    @lru_cache(maxsize=256)
+    def _session_context(session_id: str, last_message_id: Optional[int]) -> Optional[str]:
+        return Summarizer(config, get_db()).generate_session_context(session_id)
+
+    def session_context(session_id: str) -> Optional[str]:
+        """Generate (or reuse) the resume context for a session.
+
+        Messages are only ever appended, so a context stays valid until the
+        session gets a new message.
+        """
+        return _session_context(session_id, get_db().get_last_message_id(session_id))
+
+    def list_filter_projects() -> list[dict]:
+        """Get the projects for filter dropdowns (cached by Database.list_projects)."""
+        return database.list_projects()
+
     @app.context_processor
     def inject_globals():
         """Inject global variables into all templates."""
-        pid = read_pid_file()
-        daemon_running = pid and is_process_running(pid)
+        pid, daemon_running = _daemon_status()
         # Use local time for display in templates
         return {
             'daemon_running': daemon_running,
@@ -45,6 +239,12 @@ def create_app(config=None):
             'now': utc_to_local(utc_now()),  # Current local time for display
         }
 
+    def local_offset() -> timedelta:
+        """Get the local UTC offset, looked up once per request for all rows."""
+        if 'local_offset' not in g:
+            g.local_offset = get_local_offset()
+        return g.local_offset
+
     @app.template_filter('localtime')
     def localtime_filter(dt):
         """Convert UTC datetime to local time string.
@@ -55,7 +255,7 @@ def create_app(config=None):
         if dt is None:
             return ''
         if isinstance(dt, datetime):
-            return utc_to_local(dt).strftime('%Y-%m-%d %H:%M:%S')
+            return (dt + local_offset()).strftime('%Y-%m-%d %H:%M:%S')
         return str(dt)
 
     @app.template_filter('localdate')
@@ -68,7 +268,7 @@ def create_app(config=None):
         if dt is None:
             return ''
         if isinstance(dt, datetime):
-            return utc_to_local(dt).strftime('%Y-%m-%d')
+            return (dt + local_offset()).strftime('%Y-%m-%d')
         return str(dt)
 
     @app.template_filter('shorttime')
@@ -80,7 +280,7 @@ def create_app(config=None):
         if dt is None:
             return ''
         if isinstance(dt, datetime):
-            return utc_to_local(dt).strftime('%H:%M:%S')
+            return (dt + local_offset()).strftime('%H:%M:%S')
         return str(dt)
 
     @app.template_filter('timeago')
@@ -93,7 +293,10 @@ def create_app(config=None):
         if dt is None:
             return ''
         if isinstance(dt, datetime):
-            return ts_timeago(dt)
+            # Measure every timestamp on the page from the same moment
+            if 'timeago_now' not in g:
+                g.timeago_now = utc_now()
+            return ts_timeago(dt, g.timeago_now)
         return str(dt)
 
     @app.template_filter('markdown')
@@ -101,94 +304,37 @@ def create_app(config=None):
         """Convert markdown to HTML."""
         if not text:
             return ''
+        return Markup(_render_markdown(str(text)))
 
-        # Escape HTML first
-        text = str(text)
-
-        # Convert markdown to HTML (simple implementation)
-        lines = text.split('\n')
-        html_lines = []
-        in_list = False
-
-        for line in lines:
-            stripped = line.strip()
-
-            # Headers
-            if stripped.startswith('## '):
-                if in_list:
-                    html_lines.append('</ul>')
-                    in_list = False
-                html_lines.append(f'<h2 class="text-lg font-semibold mt-4 mb-2 text-gray-900 dark:text-white">{stripped[3:]}</h2>')
-            elif stripped.startswith('### '):
-                if in_list:
-                    html_lines.append('</ul>')
-                    in_list = False
-                html_lines.append(f'<h3 class="text-base font-semibold mt-3 mb-2 text-gray-900 dark:text-white">{stripped[4:]}</h3>')
-            # Bullet points
-            elif stripped.startswith('- '):
-                if not in_list:
-                    html_lines.append('<ul class="list-disc list-inside space-y-1 mb-3 text-gray-700 dark:text-gray-300">')
-                    in_list = True
-                # Handle bold text in list items
-                item_text = stripped[2:]
-                item_text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', item_text)
-                html_lines.append(f'<li>{item_text}</li>')
-            # Empty line
-            elif not stripped:
-                if in_list:
-                    html_lines.append('</ul>')
-                    in_list = False
-                html_lines.append('<br>')
-            # Regular paragraph
-            else:
-                if in_list:
-                    html_lines.append('</ul>')
-                    in_list = False
-                # Handle bold text
-                para_text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', stripped)
-                html_lines.append(f'<p class="mb-2 text-gray-700 dark:text-gray-300">{para_text}</p>')
-
-        if in_list:
-            html_lines.append('</ul>')
-
-        return Markup('\n'.join(html_lines))
+    # Compile all templates up front so no request pays for it
+    if not app.debug:
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
 
     # ============= Main Routes =============
 
     @app.route('/')
     def index():
         """Dashboard home page."""
-        helper = QueryHelper(config)
-        db = Database(config)
-
-        # Get today's activity
-        today_activity = helper.get_today_activity()
-
-        # Get stats
-        stats = db.get_stats()
-
-        # Get recent projects with their sessions (tree structure)
-        recent_activity = helper.get_recent_projects_with_sessions(
-            project_limit=4,
-            sessions_per_project=3
-        )
+        # Today's activity, stats and recent projects with their sessions
+        # (tree structure)
+        dashboard = get_helper().get_dashboard()
 
         return render_template('index.html',
-                             today=today_activity,
-                             stats=stats,
-                             recent_activity=recent_activity)
+                             today=dashboard['today'],
+                             stats=dashboard['stats'],
+                             recent_activity=dashboard['recent_activity'])
 
     @app.route('/today')
     def today():
         """Today's activity page."""
-        helper = QueryHelper(config)
+        helper = get_helper()
         project_id = request.args.get('project_id', type=int)
 
         activity = helper.get_today_activity(project_id)
 
         # Get projects for filter dropdown
-        db = Database(config)
-        projects = db.list_projects()
+        projects = list_filter_projects()
 
         return render_template('today.html',
                              activity=activity,
@@ -198,105 +344,72 @@ def create_app(config=None):
     @app.route('/sessions')
     def sessions():
         """Sessions list page."""
-        helper = QueryHelper(config)
-        db = Database(config)
+        helper = get_helper()
 
         project_id = request.args.get('project_id', type=int)
-        page = request.args.get('page', 1, type=int)
+        before_id = request.args.get('before_id', type=int)
         per_page = 20
 
         sessions_list = helper.get_recent_sessions(
             project_id=project_id,
+            before_id=before_id,
+            nonempty=True,
             limit=per_page + 1  # Get one extra to check if there's more
         )
 
-        # Filter out empty sessions
-        sessions_list = [s for s in sessions_list
-                        if s.get('user_count', 0) > 0 or s.get('assistant_count', 0) > 0]
-
         has_more = len(sessions_list) > per_page
         sessions_list = sessions_list[:per_page]
+        # The next page continues after the last session shown
+        next_cursor = sessions_list[-1]['id'] if has_more else None
 
-        projects = db.list_projects()
+        projects = list_filter_projects()
 
         return render_template('sessions.html',
                              sessions=sessions_list,
                              projects=projects,
                              selected_project_id=project_id,
-                             page=page,
-                             has_more=has_more)
+                             next_cursor=next_cursor)
 
     @app.route('/session/<session_id>')
     def session_detail(session_id):
         """Single session detail page."""
-        helper = QueryHelper(config)
-        db = Database(config)
+        db = get_db()
+        helper = get_helper()
 
         # Try to find session by prefix match
-        with db.connection() as conn:
-            cursor = conn.execute(
-                "SELECT session_id FROM sessions WHERE session_id LIKE ?",
-                (f"{session_id}%",)
-            )
-            row = cursor.fetchone()
-            if row:
-                session_id = row['session_id']
+        session_id = db.find_session_id(session_id) or session_id
 
-        detail = helper.get_session_detail(session_id)
+        # Empty and tool-only messages are left out of the conversation
+        detail = helper.get_session_detail(session_id, exclude_tools=True)
 
         if not detail:
             return render_template('error.html',
                                  message=f"Session not found: {session_id}"), 404
 
-        # Filter messages
-        messages = detail.get('messages', [])
-        filtered_messages = []
-        for msg in messages:
-            role = msg.get('role')
-            content = msg.get('content') or ''
-
-            if not role or not content.strip():
-                continue
-            if content.strip().startswith('[Tool:') or content.strip() == '[Tool Result]':
-                continue
-
-            filtered_messages.append(msg)
-
-        detail['messages'] = filtered_messages
-
-        return render_template('session.html', session=detail)
+        # Long conversations render progressively instead of being built
+        # into one string before the first byte is sent
+        return stream_template('session.html', session=detail)
 
     @app.route('/projects')
     def projects():
         """Projects list page."""
-        db = Database(config)
-        projects_list = db.list_projects()
-
-        # Enrich with session counts
-        for p in projects_list:
-            with db.connection() as conn:
-                cursor = conn.execute(
-                    "SELECT COUNT(*) as count FROM sessions WHERE project_id = ?",
-                    (p['id'],)
-                )
-                p['session_count'] = cursor.fetchone()['count']
+        db = get_db()
+        projects_list = db.list_projects_with_session_counts()
 
         return render_template('projects.html', projects=projects_list)
 
     @app.route('/project/<int:project_id>')
     def project_detail(project_id):
         """Single project detail page."""
-        db = Database(config)
-        helper = QueryHelper(config)
+        db = get_db()
+        helper = get_helper()
 
         project = db.get_project(project_id)
         if not project:
             return render_template('error.html',
                                  message=f"Project not found: {project_id}"), 404
 
-        sessions_list = helper.get_recent_sessions(project_id=project_id, limit=50)
-        sessions_list = [s for s in sessions_list
-                        if s.get('user_count', 0) > 0 or s.get('assistant_count', 0) > 0]
+        sessions_list = helper.get_recent_sessions(project_id=project_id, limit=50, nonempty=True)
 
         return render_template('project.html',
                              project=project,
@@ -305,8 +418,7 @@ def create_app(config=None):
     @app.route('/search')
     def search():
         """Search page."""
-        helper = QueryHelper(config)
-        db = Database(config)
+        helper = get_helper()
 
         query = request.args.get('q', '').strip()
         project_id = request.args.get('project_id', type=int)
@@ -315,7 +427,7 @@ def create_app(config=None):
         if query:
             results = helper.search_messages(query, project_id, limit=50)
 
-        projects = db.list_projects()
+        projects = list_filter_projects()
 
         return render_template('search.html',
                              query=query,
@@ -326,11 +438,11 @@ def create_app(config=None):
     @app.route('/live')
     def live():
         """Live activity feed page - shows recent activity in real-time."""
-        db = Database(config)
+        db = get_db()
         project_id = request.args.get('project_id', type=int)
 
         # Get all projects for filter dropdown
-        projects = db.list_projects()
+        projects = list_filter_projects()
 
         # Get initial batch of live entries
         entries = _get_live_entries(db, project_id, limit=100)
@@ -347,6 +459,10 @@ def create_app(config=None):
         Each entry contains: id, timestamp, project_name, role, content_preview
         Filters out empty messages and tool-only messages.
         """
+        # Only the start of the content is needed for the preview (first
+        # meaningful line, at most 150 chars); assistant messages can be many KB
+        preview_source = f"SUBSTR(m.content, 1, {LIVE_PREVIEW_SOURCE_CHARS}) as content"
+
         # Common filter to exclude empty/tool-only messages
         content_filter = """
             AND m.content IS NOT NULL
@@ -359,7 +475,7 @@ def create_app(config=None):
             if since_id is not None:
                 # Incremental update: get new entries after since_id in chronological order
                 query = f"""
-                    SELECT m.id, m.timestamp, m.role, m.content,
+                    SELECT m.id, m.timestamp, m.role, {preview_source},
                            s.session_id, p.name as project_name, p.path as project_path
                     FROM messages m
                     JOIN sessions s ON m.session_id = s.id
@@ -375,9 +491,9 @@ def create_app(config=None):
                 query += " ORDER BY m.id ASC LIMIT ?"
                 params.append(limit)
             else:
-                # Initial load: get recent entries, then reverse for chronological order
+                # Initial load: get the most recent entries, in chronological order
                 query = f"""
-                    SELECT m.id, m.timestamp, m.role, m.content,
+                    SELECT m.id, m.timestamp, m.role, {preview_source},
                            s.session_id, p.name as project_name, p.path as project_path
                     FROM messages m
                     JOIN sessions s ON m.session_id = s.id
@@ -391,43 +507,26 @@ def create_app(config=None):
                     params.append(project_id)
                 query += " ORDER BY m.id DESC LIMIT ?"
                 params.append(limit)
-
-            cursor = conn.execute(query, params)
-            rows = [dict(row) for row in cursor.fetchall()]
-
-        # For initial load, reverse to get chronological order
-        if since_id is None:
-            rows = list(reversed(rows))
-
-        # Process entries to create preview
-        entries = []
-        for row in rows:
-            content = row.get('content', '') or ''
-
-            # Clean up content - remove tool markers, get first meaningful line
-            lines = content.strip().split('\n')
-            preview = ''
-            for line in lines:
-                line = line.strip()
-                if line and not line.startswith('[Tool:') and line != '[Tool Result]':
-                    preview = line[:150]
-                    if len(line) > 150:
-                        preview += '...'
-                    break
-
-            # Skip entries that still have no meaningful content
-            if not preview:
-                continue
-
-            entries.append({
-                'id': row['id'],
-                'timestamp': row['timestamp'],
-                'project_name': row['project_name'],
-                'project_path': row['project_path'],
-                'session_id': row['session_id'],
-                'role': row['role'],
-                'preview': preview
-            })
+                query = f"SELECT * FROM ({query}) ORDER BY id ASC"
+
+            # Build entries with previews straight from the cursor
+            entries = []
+            for row in conn.execute(query, params):
+                preview = _live_preview(row['id'], row['content'] or '')
+
+                # Skip entries that still have no meaningful content
+                if not preview:
+                    continue
+
+                entries.append({
+                    'id': row['id'],
+                    'timestamp': row['timestamp'],
+                    'project_name': row['project_name'],
+                    'project_path': row['project_path'],
+                    'session_id': row['session_id'],
+                    'role': row['role'],
+                    'preview': preview
+                })
 
         return entries
 
@@ -436,18 +535,23 @@ def create_app(config=None):
     @app.route('/summaries')
     def summaries():
         """Summaries overview page."""
-        db = Database(config)
+        db = get_db()
 
-        # Get recent summaries
+        # Get recent summaries. Only the columns shown are selected, and only
+        # enough of each summary for the 300-char preview and its "..."
         with db.connection() as conn:
             cursor = conn.execute("""
-                SELECT s.*, p.name as project_name
+                SELECT s.period_type, s.period_start, s.period_end, s.created_at,
+                       SUBSTR(s.summary, 1, 301) as summary,
+                       p.name as project_name
                 FROM summaries s
                 LEFT JOIN projects p ON s.project_id = p.id
                 ORDER BY s.period_start DESC
                 LIMIT 50
             """)
-            summaries_list = [dict(row) for row in cursor.fetchall()]
+            # Rows go to the template as they are: Jinja reads the columns
+            # by name without copying each row into a dict
+            summaries_list = cursor.fetchall()
 
         return render_template('summaries.html', summaries=summaries_list)
 
@@ -455,26 +559,26 @@ def create_app(config=None):
     @app.route('/summary/week/<int:offset>')
     def week_summary(offset=0):
         """Weekly summary page."""
-        db = Database(config)
-        helper = QueryHelper(config)
+        db = get_db()
 
         project_id = request.args.get('project_id', type=int)
         week_start, week_end = get_week_range(offset)
 
         summary = db.get_summary('weekly', week_start, project_id)
 
-        # Get daily activity for the week
-        daily_activity = []
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            if day <= date.today():
-                day_summary = db.get_summary('daily', day, project_id)
-                daily_activity.append({
-                    'date': day,
-                    'summary': day_summary
-                })
+        # Get daily activity for the week, up to today
+        days = [week_start + timedelta(days=i) for i in range(7)]
+        days = [day for day in days if day <= date.today()]
+        daily_summaries = {}
+        if days:
+            for day_summary in db.get_summaries_in_range('daily', days[0], days[-1], project_id):
+                daily_summaries[day_summary['period_start']] = day_summary
+        daily_activity = [
+            {'date': day, 'summary': daily_summaries.get(day)}
+            for day in days
+        ]
 
-        projects = db.list_projects()
+        projects = list_filter_projects()
 
         return render_template('week_summary.html',
                              week_start=week_start,
@@ -489,7 +593,7 @@ def create_app(config=None):
     @app.route('/summary/month/<int:year>/<int:month>')
     def month_summary(year=None, month=None):
         """Monthly summary page."""
-        db = Database(config)
+        db = get_db()
 
         if year is None or month is None:
             today = date.today()
@@ -511,7 +615,7 @@ def create_app(config=None):
         # Get weekly summaries for the month
         weekly_summaries = db.get_summaries_in_range('weekly', month_start, month_end, project_id)
 
-        projects = db.list_projects()
+        projects = list_filter_projects()
 
         return render_template('month_summary.html',
                              year=year,
@@ -533,19 +637,21 @@ def create_app(config=None):
         project_id = request.form.get('project_id', type=int)
 
         try:
-            db = Database(config)
+            start_date = date.fromisoformat(period_start)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid period start'}), 400
+
+        try:
+            db = get_db()
             summarizer = Summarizer(config, db)
 
             if period_type == 'daily':
-                target_date = datetime.strptime(period_start, '%Y-%m-%d').date()
-                summary = summarizer.generate_daily_summary(target_date, project_id, force=True)
+                summary = summarizer.generate_daily_summary(start_date, project_id, force=True)
             elif period_type == 'weekly':
-                week_start = datetime.strptime(period_start, '%Y-%m-%d').date()
-                summary = summarizer.generate_weekly_summary(week_start, project_id, force=True)
+                summary = summarizer.generate_weekly_summary(start_date, project_id, force=True)
             elif period_type == 'monthly':
-                month_start = datetime.strptime(period_start, '%Y-%m-%d').date()
                 summary = summarizer.generate_monthly_summary(
-                    month_start.year, month_start.month, project_id, force=True
+                    start_date.year, start_date.month, project_id, force=True
                 )
             else:
                 return jsonify({'error': 'Invalid period type'}), 400
@@ -566,46 +672,60 @@ def create_app(config=None):
     @app.route('/api/daemon/status')
     def daemon_status():
         """Get daemon status for HTMX polling."""
-        pid = read_pid_file()
-        running = pid and is_process_running(pid)
-        return render_template('partials/daemon_status.html',
-                             running=running,
-                             pid=pid if running else None)
+        pid, running = _daemon_status()
+        etag = f"{pid}-{running}"
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(render_template('partials/daemon_status.html',
+                                                     running=running,
+                                                     pid=pid if running else None))
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = DAEMON_STATUS_SECONDS
+        return response
+
+    @lru_cache(maxsize=1)
+    def _live_activity_at(period: int) -> tuple[str, str]:
+        helper = get_helper()
+        activity = helper.get_today_activity()
+        recent_sessions = helper.get_recent_sessions(limit=5, nonempty=True)
+
+        body = render_template('partials/live_activity.html',
+                               activity=activity,
+                               recent_sessions=recent_sessions)
+        return body, hashlib.blake2b(body.encode(), digest_size=8).hexdigest()
 
     @app.route('/api/activity/live')
     def live_activity():
-        """Get live activity feed for HTMX polling."""
-        helper = QueryHelper(config)
-        activity = helper.get_today_activity()
-        recent_sessions = helper.get_recent_sessions(limit=5)
-        recent_sessions = [s for s in recent_sessions
-                         if s.get('user_count', 0) > 0 or s.get('assistant_count', 0) > 0]
+        """Get live activity feed for HTMX polling.
 
-        return render_template('partials/live_activity.html',
-                             activity=activity,
-                             recent_sessions=recent_sessions)
+        Rendered at most every LIVE_ACTIVITY_SECONDS for all open tabs;
+        a poll whose ETag still matches gets an empty 304.
+        """
+        body, etag = _live_activity_at(int(time.monotonic()) // LIVE_ACTIVITY_SECONDS)
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(body)
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = LIVE_ACTIVITY_SECONDS
+        return response
 
     @app.route('/api/session-context/<session_id>', methods=['POST'])
     def generate_session_context(session_id):
         """Generate a detailed context summary for a session."""
         try:
-            db = Database(config)
-            summarizer = Summarizer(config, db)
+            db = get_db()
 
             # Find session by prefix
-            with db.connection() as conn:
-                cursor = conn.execute(
-                    "SELECT session_id FROM sessions WHERE session_id LIKE ?",
-                    (f"{session_id}%",)
-                )
-                row = cursor.fetchone()
-                if row:
-                    session_id = row['session_id']
-                else:
-                    return render_template('partials/session_context.html',
-                                         error="Session not found")
+            session_id = db.find_session_id(session_id)
+            if session_id is None:
+                return render_template('partials/session_context.html',
+                                     error="Session not found")
 
-            context = summarizer.generate_session_context(session_id)
+            context = session_context(session_id)
 
             if context:
                 return render_template('partials/session_context.html',
@@ -621,7 +741,7 @@ def create_app(config=None):
     @app.route('/api/live/entries')
     def api_live_entries():
         """Get live feed entries for HTMX polling."""
-        db = Database(config)
+        db = get_db()
         project_id = request.args.get('project_id', type=int)
         since_id = request.args.get('since_id', type=int)
         limit = request.args.get('limit', 50, type=int)
@@ -634,22 +754,14 @@ def create_app(config=None):
     def get_session_context_raw(session_id):
         """Get raw session context for copying."""
         try:
-            db = Database(config)
-            summarizer = Summarizer(config, db)
+            db = get_db()
 
             # Find session by prefix
-            with db.connection() as conn:
-                cursor = conn.execute(
-                    "SELECT session_id FROM sessions WHERE session_id LIKE ?",
-                    (f"{session_id}%",)
-                )
-                row = cursor.fetchone()
-                if row:
-                    session_id = row['session_id']
-                else:
-                    return jsonify({'error': 'Session not found'}), 404
+            session_id = db.find_session_id(session_id)
+            if session_id is None:
+                return jsonify({'error': 'Session not found'}), 404
 
-            context = summarizer.generate_session_context(session_id)
+            context = session_context(session_id)
 
             if context:
                 return jsonify({'context': context})
@@ -662,10 +774,17 @@ def create_app(config=None):
     return app
 
 
-def run_server(host='127.0.0.1', port=5000, debug=False):
-    """Run the Flask development server."""
-    app = create_app()
-    app.run(host=host, port=port, debug=debug)
+def run_server(host='127.0.0.1', port=5000, debug=False, app=None):
+    """Run the web server.
+
+    Uses waitress with WEB_SERVER_THREADS threads when it is installed
+    and not debugging, otherwise the Flask development server.
+    """
+    app = app or create_app()
+    if waitress is not None and not debug:
+        waitress.serve(app, host=host, port=port, threads=WEB_SERVER_THREADS)
+    else:
+        app.run(host=host, port=port, debug=debug)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,9 @@
 """Tests for the database layer."""
 
+import sqlite3
 import tempfile
+import threading
+import time
 from datetime import datetime, date, timedelta
 from pathlib import Path
 
@@ -56,6 +59,21 @@ class TestProjectOperations:
         projects = temp_db.list_projects()
         assert len(projects) == 2
 
+    def test_list_projects_sees_new_projects(self, temp_db):
+        temp_db.get_or_create_project("/path/a", "alpha")
+        assert len(temp_db.list_projects()) == 1
+        temp_db.get_or_create_project_and_session("/path/b", "beta", None, "uuid-1")
+        assert [p['name'] for p in temp_db.list_projects()] == ["alpha", "beta"]
+
+    def test_list_projects_with_session_counts(self, temp_db):
+        busy = temp_db.get_or_create_project("/path/busy", "busy")
+        temp_db.get_or_create_project("/path/idle", "idle")
+        temp_db.get_or_create_session("uuid-1", busy)
+        temp_db.get_or_create_session("uuid-2", busy)
+
+        counts = {p['name']: p['session_count'] for p in temp_db.list_projects_with_session_counts()}
+        assert counts == {"busy": 2, "idle": 0}
+
 
 class TestSessionOperations:
     """Tests for session CRUD operations."""
@@ -72,6 +90,37 @@ class TestSessionOperations:
         id2 = temp_db.get_or_create_session("uuid-123", project_id)
         assert id1 == id2
 
+    def test_get_or_create_project_and_session(self, temp_db):
+        project_id, session_db_id = temp_db.get_or_create_project_and_session(
+            "/path/repo", "repo", "acme", "uuid-123", source='cursor', git_branch="main"
+        )
+        assert temp_db.get_project(project_id)['org'] == "acme"
+        assert temp_db.get_session("uuid-123")['source'] == 'cursor'
+
+        # Existing rows are returned unchanged
+        again = temp_db.get_or_create_project_and_session("/path/repo", "other", None, "uuid-123", git_branch="dev")
+        assert again == (project_id, session_db_id)
+        assert temp_db.get_project(project_id)['name'] == "repo"
+        assert temp_db.get_session("uuid-123")['git_branch'] == "main"
+
+    def test_get_file_state(self, temp_db):
+        assert temp_db.get_file_state("/some/file.jsonl", "uuid-123") == (0, None)
+
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        temp_db.update_position("/some/file.jsonl", 1000)
+        assert temp_db.get_file_state("/some/file.jsonl", "uuid-123") == (1000, session_db_id)
+
+    def test_find_session_id(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        temp_db.get_or_create_session("abc123-def", project_id)
+        temp_db.get_or_create_session("abd456-ghi", project_id)
+
+        assert temp_db.find_session_id("abc") == "abc123-def"
+        assert temp_db.find_session_id("abd456-ghi") == "abd456-ghi"
+        assert temp_db.find_session_id("ab_") is None
+        assert temp_db.find_session_id("xyz") is None
+
     def test_update_session(self, temp_db):
         project_id = temp_db.get_or_create_project("/path/repo", "repo")
         temp_db.get_or_create_session("uuid-123", project_id)
@@ -146,6 +195,37 @@ class TestMessageOperations:
         assert id1 is not None
         assert id2 is None  # Duplicate should return None
 
+    def test_insert_messages_bulk(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        t1 = datetime(2024, 1, 15, 10, 0, 0)
+        t2 = datetime(2024, 1, 15, 10, 5, 0)
+        temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, t1)
+
+        inserted = temp_db.insert_messages_bulk(session_db_id, [
+            ("msg-1", "user", "user", "Hello", None, t1, None, None),  # duplicate
+            ("msg-2", "assistant", "assistant", "Hi", "claude", t2, 10, 20),
+        ])
+
+        assert inserted == [{'role': 'assistant', 'timestamp': t2}]
+        assert len(temp_db.get_messages_for_session(session_db_id)) == 2
+
+    def test_session_message_counts(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        now = datetime.now()
+
+        temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, now)
+        temp_db.insert_messages_bulk(session_db_id, [
+            ("msg-1", "user", "user", "Hello", None, now, None, None),  # duplicate
+            ("msg-2", "assistant", "assistant", "Hi", "claude", now, 10, 20),
+            ("msg-3", "system", None, "Started", None, now, None, None),
+        ])
+
+        session = temp_db.get_session("uuid-123")
+        assert session['user_count'] == 1
+        assert session['assistant_count'] == 1
+
     def test_get_messages_for_session(self, temp_db):
         project_id = temp_db.get_or_create_project("/path/repo", "repo")
         session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
@@ -157,6 +237,51 @@ class TestMessageOperations:
         messages = temp_db.get_messages_for_session(session_db_id)
         assert len(messages) == 2
 
+    def test_get_messages_for_session_exclude_tools(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        now = datetime.now()
+
+        for i, (role, content) in enumerate([
+            ("user", "Hello"),
+            ("assistant", "\n[Tool: Read]\n"),
+            ("user", "[Tool Result]"),
+            (None, "system text"),
+            ("assistant", " \t\n"),
+            ("assistant", None),
+            ("assistant", "Done\n[Tool: Edit]"),
+        ]):
+            temp_db.insert_message(session_db_id, f"msg-{i}", "x", role, content, None, now)
+
+        messages = temp_db.get_messages_for_session(session_db_id, exclude_tools=True)
+        assert [m['content'] for m in messages] == ["Hello", "Done\n[Tool: Edit]"]
+
+    def test_get_last_message_id(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        assert temp_db.get_last_message_id("uuid-123") is None
+
+        temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, datetime.now())
+        last_id = temp_db.insert_message(session_db_id, "msg-2", "assistant", "assistant", "Hi", None, datetime.now())
+        assert temp_db.get_last_message_id("uuid-123") == last_id
+
+    def test_message_search_index(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        msg_id = temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Fix the Parser", None, datetime.now())
+        temp_db.insert_message(session_db_id, "msg-2", "assistant", "assistant", None, None, datetime.now())
+        assert temp_db.has_search_index
+
+        def search(text):
+            with temp_db.connection() as conn:
+                cursor = conn.execute("SELECT rowid FROM messages_fts WHERE content LIKE ?", (f"%{text}%",))
+                return [row[0] for row in cursor.fetchall()]
+
+        assert search("parse") == [msg_id]
+        with temp_db.connection() as conn:
+            conn.execute("DELETE FROM messages WHERE id = ?", (msg_id,))
+        assert search("parse") == []
+
     def test_get_messages_in_range(self, temp_db):
         project_id = temp_db.get_or_create_project("/path/repo", "repo")
         session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
@@ -174,6 +299,59 @@ class TestMessageOperations:
         assert messages[0]['uuid'] == "msg-new"
 
 
+    def test_get_messages_in_range_truncated(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        now = datetime.now()
+
+        temp_db.insert_message(session_db_id, "msg-short", "user", "user", "Short", None, now)
+        temp_db.insert_message(session_db_id, "msg-long", "user", "user", "x" * 500, None, now)
+
+        start = now - timedelta(hours=1)
+        end = now + timedelta(hours=1)
+        messages = {m['uuid']: m for m in temp_db.get_messages_in_range_truncated(start, end, limit_chars=300)}
+
+        assert messages["msg-short"]['content'] == "Short"
+        assert not messages["msg-short"]['truncated']
+        assert len(messages["msg-long"]['content']) == 300
+        assert messages["msg-long"]['truncated']
+        assert messages["msg-long"]['project_name'] == "repo"
+
+    def test_get_user_messages_and_assistant_counts(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        now = datetime.now()
+
+        temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Question", None, now)
+        temp_db.insert_message(session_db_id, "msg-2", "assistant", "assistant", "Answer", "claude", now)
+        temp_db.insert_message(session_db_id, "msg-3", "assistant", "assistant", "More", "claude", now)
+
+        start = now - timedelta(hours=1)
+        end = now + timedelta(hours=1)
+        user_messages, assistant_counts = temp_db.get_user_messages_and_assistant_counts(start, end)
+
+        assert [m['uuid'] for m in user_messages] == ["msg-1"]
+        assert assistant_counts == {"repo": 2}
+
+    def test_get_messages_bucketed_by_date(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+
+        day1 = date.today() - timedelta(days=3)
+        day2 = date.today() - timedelta(days=1)
+        ts1 = datetime.combine(day1, datetime.min.time().replace(hour=10))
+        ts2 = datetime.combine(day2, datetime.min.time().replace(hour=11))
+
+        temp_db.insert_message(session_db_id, "msg-1", "user", "user", "First", None, ts1)
+        temp_db.insert_message(session_db_id, "msg-2", "user", "user", "Second", None, ts1)
+        temp_db.insert_message(session_db_id, "msg-3", "user", "user", "Third", None, ts2)
+
+        buckets = temp_db.get_messages_bucketed_by_date(day1, day2)
+        assert set(buckets) == {day1, day2}
+        assert [m['uuid'] for m in buckets[day1]] == ["msg-1", "msg-2"]
+        assert [m['uuid'] for m in buckets[day2]] == ["msg-3"]
+
+
 class TestProcessedFilesTracking:
     """Tests for file position tracking."""
 
@@ -186,6 +364,11 @@ class TestProcessedFilesTracking:
         pos = temp_db.get_last_position("/some/file.jsonl")
         assert pos == 1000
 
+    def test_list_tracked_paths(self, temp_db):
+        temp_db.update_position("/some/a.jsonl", 1000)
+        temp_db.update_position("/some/b.jsonl", 20)
+        assert temp_db.list_tracked_paths() == {"/some/a.jsonl": 1000, "/some/b.jsonl": 20}
+
     def test_update_position_multiple_times(self, temp_db):
         temp_db.update_position("/some/file.jsonl", 1000)
         temp_db.update_position("/some/file.jsonl", 2000)
@@ -193,6 +376,139 @@ class TestProcessedFilesTracking:
         assert pos == 2000
 
 
+class TestTransactions:
+    """Tests for grouping writes into one transaction."""
+
+    def test_connection_settings(self, temp_db):
+        with temp_db.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+    def test_transaction_commits(self, temp_db):
+        with temp_db.transaction():
+            project_id = temp_db.get_or_create_project("/path/repo", "repo")
+            session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+            temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, datetime.now())
+            temp_db.update_position("/some/file.jsonl", 1000)
+
+        assert len(temp_db.get_messages_for_session(session_db_id)) == 1
+        assert temp_db.get_last_position("/some/file.jsonl") == 1000
+
+    def test_transaction_rolls_back_on_error(self, temp_db):
+        with pytest.raises(RuntimeError):
+            with temp_db.transaction():
+                temp_db.get_or_create_project("/path/repo", "repo")
+                temp_db.update_position("/some/file.jsonl", 1000)
+                raise RuntimeError("boom")
+
+        assert temp_db.get_project_by_path("/path/repo") is None
+        assert temp_db.get_last_position("/some/file.jsonl") == 0
+
+    def test_duplicate_inside_transaction(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+        with temp_db.transaction():
+            first = temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, datetime.now())
+            second = temp_db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, datetime.now())
+
+        assert first is not None
+        assert second is None
+        assert len(temp_db.get_messages_for_session(session_db_id)) == 1
+
+    def test_pinned_connection(self, temp_db):
+        temp_db.pin_connection()
+        try:
+            with temp_db.connection() as first:
+                project_id = temp_db.get_or_create_project("/path/repo", "repo")
+            with temp_db.transaction() as second:
+                temp_db.get_or_create_session("uuid-123", project_id)
+            assert first is second
+            assert not first.in_transaction
+        finally:
+            temp_db.unpin_connection()
+
+        assert temp_db.get_session("uuid-123") is not None
+
+    def test_snapshot(self, temp_db):
+        other = Database(temp_db.config)
+        temp_db.get_or_create_project("/path/a", "alpha")
+        with temp_db.snapshot():
+            assert temp_db.get_project_by_path("/path/a") is not None
+            other.get_or_create_project("/path/b", "beta")
+            assert temp_db.get_project_by_path("/path/b") is None
+        assert temp_db.get_project_by_path("/path/b") is not None
+
+    def test_connection_pool(self, temp_db):
+        db = Database(temp_db.config, pool_size=1)
+        with db.connection() as first:
+            pass
+        with db.connection() as second:
+            with db.connection() as third:
+                pass
+        assert first is second
+        assert third is not first
+
+        # Only one idle connection is kept: third went back to the pool,
+        # so second was closed when released
+        with pytest.raises(sqlite3.ProgrammingError):
+            second.execute("SELECT 1")
+        with db.connection() as fourth:
+            assert fourth is third
+        db.close()
+
+    def test_writer_thread(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+
+        def fail():
+            temp_db.update_position("/other/file.jsonl", 500)
+            raise ValueError("bad job")
+
+        temp_db.start_writer()
+        try:
+            result = temp_db.run_write(
+                temp_db.insert_message, session_db_id, "msg-1", "user", "user", "Hello", None, datetime.now()
+            )
+            with pytest.raises(ValueError):
+                temp_db.run_write(fail)
+        finally:
+            temp_db.stop_writer()
+
+        assert result is not None
+        assert len(temp_db.get_messages_for_session(session_db_id)) == 1
+        # The failed job's writes are rolled back
+        assert temp_db.get_last_position("/other/file.jsonl") == 0
+
+    def test_run_write_while_writer_stops(self, temp_db):
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(10)
+
+        temp_db.start_writer()
+        busy_caller = threading.Thread(target=temp_db.run_write, args=(busy,), daemon=True)
+        busy_caller.start()
+        assert started.wait(5)
+
+        # Stop the writer while its job is still running
+        stopper = threading.Thread(target=temp_db.stop_writer, daemon=True)
+        stopper.start()
+        while temp_db._write_queue.empty():  # Until the stop sentinel is queued
+            time.sleep(0.01)
+
+        # A job submitted during shutdown runs inline instead of waiting forever
+        results = []
+        late_caller = threading.Thread(target=lambda: results.append(temp_db.run_write(lambda: 42)), daemon=True)
+        late_caller.start()
+        release.set()
+        for thread in (busy_caller, stopper, late_caller):
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+        assert results == [42]
+
+
 class TestSummaryOperations:
     """Tests for summary operations."""
 
@@ -242,6 +558,20 @@ class TestSummaryOperations:
         summaries = temp_db.get_summaries_in_range('daily', d1, d2)
         assert len(summaries) == 2
 
+    def test_session_context_cache(self, temp_db):
+        project_id = temp_db.get_or_create_project("/path/repo", "repo")
+        session_db_id = temp_db.get_or_create_session("uuid-123", project_id)
+
+        assert temp_db.get_cached_session_context(session_db_id, "hash-a") is None
+
+        temp_db.save_session_context(session_db_id, "hash-a", "Context A")
+        assert temp_db.get_cached_session_context(session_db_id, "hash-a") == "Context A"
+
+        # A new hash replaces the cached entry for the session
+        temp_db.save_session_context(session_db_id, "hash-b", "Context B")
+        assert temp_db.get_cached_session_context(session_db_id, "hash-a") is None
+        assert temp_db.get_cached_session_context(session_db_id, "hash-b") == "Context B"
+
 
 class TestStatistics:
     """Tests for statistics queries."""
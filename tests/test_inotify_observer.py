@@ -0,0 +1,168 @@
+"""Tests for the inotify observer."""
+
+import os
+import queue
+import sys
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileSystemEventHandler
+
+from claude_activity.inotify_observer import INOTIFY_AVAILABLE, InotifyObserver, flags
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith('linux') or not INOTIFY_AVAILABLE,
+    reason="inotify observer needs Linux and inotify_simple"
+)
+
+
+class RecordingHandler(FileSystemEventHandler):
+    """Collects dispatched events for the test to wait on."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def dispatch(self, event):
+        self.events.put(event)
+
+    def wait_for(self, event_type, path, timeout=5.0):
+        """Wait for an event of event_type for path, failing after timeout.
+
+        Returns the events dispatched before it.
+        """
+        path = str(path)
+        earlier = []
+        while True:
+            try:
+                event = self.events.get(timeout=timeout)
+            except queue.Empty:
+                pytest.fail(f"No {event_type.__name__} for {path}")
+            if isinstance(event, event_type) and event.src_path == path:
+                return earlier
+            earlier.append(event)
+
+
+@pytest.fixture
+def watched_dir():
+    """Start an observer on a temporary tree, yielding (root, handler)."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        (root / "-home-user-repo").mkdir()
+        handler = RecordingHandler()
+        observer = InotifyObserver()
+        observer.schedule(handler, str(root))
+        observer.start()
+        try:
+            yield root, handler
+        finally:
+            observer.stop()
+            observer.join(timeout=5)
+
+
+class TestInotifyObserver:
+    """Tests for InotifyObserver."""
+
+    def test_create_file(self, watched_dir):
+        root, handler = watched_dir
+        path = root / "-home-user-repo" / "session.jsonl"
+        path.write_text('{"type": "user"}\n')
+
+        handler.wait_for(FileCreatedEvent, path)
+
+    def test_append_to_file(self, watched_dir):
+        root, handler = watched_dir
+        path = root / "-home-user-repo" / "session.jsonl"
+        path.write_text('{"type": "user"}\n')
+        handler.wait_for(FileCreatedEvent, path)
+
+        with path.open('a') as f:
+            f.write('{"type": "assistant"}\n')
+
+        handler.wait_for(FileModifiedEvent, path)
+
+    def test_move_file_in(self, watched_dir):
+        root, handler = watched_dir
+        with tempfile.TemporaryDirectory() as outside:
+            source = Path(outside) / "session.jsonl"
+            source.write_text('{"type": "user"}\n')
+            path = root / "-home-user-repo" / "session.jsonl"
+            source.rename(path)
+
+            handler.wait_for(FileCreatedEvent, path)
+
+    def test_file_in_new_subdirectory(self, watched_dir):
+        root, handler = watched_dir
+        project_dir = root / "-home-user-new-repo"
+        project_dir.mkdir()
+        path = project_dir / "session.jsonl"
+        path.write_text('{"type": "user"}\n')
+        handler.wait_for(FileCreatedEvent, path)
+
+        # The new directory is watched from now on
+        with path.open('a') as f:
+            f.write('{"type": "assistant"}\n')
+        handler.wait_for(FileModifiedEvent, path)
+
+    def test_skips_subagent_directories(self, watched_dir):
+        root, handler = watched_dir
+        subagents = root / "-home-user-repo" / "session-id" / "subagents"
+        subagents.mkdir(parents=True)
+        (subagents / "agent-1.jsonl").write_text('{"type": "user"}\n')
+
+        # A file created afterwards arrives without any subagent event before it
+        marker = root / "-home-user-repo" / "marker.jsonl"
+        marker.write_text("")
+        earlier = handler.wait_for(FileCreatedEvent, marker)
+        assert not [e for e in earlier if "subagents" in e.src_path]
+
+    def test_queue_overflow_rescans(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            existing = root / "-home-user-repo" / "session.jsonl"
+            existing.parent.mkdir()
+            existing.write_text('{"type": "user"}\n')
+            handler = RecordingHandler()
+            observer = InotifyObserver()
+            observer.schedule(handler, str(root))
+
+            # A directory created while events were being lost
+            new_file = root / "-home-user-new-repo" / "session.jsonl"
+            new_file.parent.mkdir()
+            new_file.write_text('{"type": "user"}\n')
+
+            try:
+                observer._dispatch(SimpleNamespace(wd=-1, mask=flags.Q_OVERFLOW, cookie=0, name=''))
+                handler.events.put(None)
+                events = []
+                while (event := handler.events.get(timeout=1)) is not None:
+                    events.append((type(event), event.src_path))
+            finally:
+                observer.stop()
+
+        assert (FileModifiedEvent, str(existing)) in events
+        assert (FileCreatedEvent, str(new_file)) in events
+
+    def test_stop_after_thread_died(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            observer = InotifyObserver()
+            observer.schedule(RecordingHandler(), str(root))
+
+            def fail(timeout=None):
+                raise OSError("read failed")
+
+            observer._inotify.read = fail
+            observer.start()
+            (root / "session.jsonl").write_text("")
+            observer.join(timeout=5)
+            assert not observer.is_alive()
+
+            wake_w = observer._wake_w
+            observer.stop()
+            observer.stop()
+
+        # The pipe is closed once, by stop()
+        with pytest.raises(OSError):
+            os.fstat(wake_w)
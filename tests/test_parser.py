@@ -7,6 +7,7 @@ from pathlib import Path
 
 import pytest
 
+from claude_activity import parser
 from claude_activity.parser import (
     decode_project_path,
     extract_project_info,
@@ -86,6 +87,10 @@ class TestExtractTextContent:
         assert "Let me help" in result
         assert "[Tool: read_file]" in result
 
+    def test_tool_only_blocks(self):
+        content = [{"type": "tool_use", "name": "read_file"}]
+        assert extract_text_content(content) is None
+
     def test_dict_with_text(self):
         content = {"text": "Message text"}
         assert extract_text_content(content) == "Message text"
@@ -115,6 +120,14 @@ class TestParseTimestamp:
         assert result.month == 1
         assert result.day == 15
 
+    def test_sqlite_format_string(self):
+        result = parse_timestamp("2024-01-15 10:30:00.759000")
+        assert result == datetime(2024, 1, 15, 10, 30, 0, 759000)
+
+    def test_offset_string_converted_to_utc(self):
+        result = parse_timestamp("2024-01-15T10:30:00-08:00")
+        assert result == datetime(2024, 1, 15, 18, 30, 0)
+
 
 class TestParseMessage:
     """Tests for parse_message function."""
@@ -214,6 +227,48 @@ class TestParseSessionFile:
         finally:
             temp_path.unlink()
 
+    def test_partial_trailing_line_not_consumed(self):
+        complete = json.dumps({"uuid": "1", "type": "user", "content": "First", "timestamp": "2024-01-15T10:30:00"}) + '\n'
+        partial = json.dumps({"uuid": "2", "type": "user", "content": "Second", "timestamp": "2024-01-15T10:31:00"})
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
+            f.write(complete + partial[:20])
+            temp_path = Path(f.name)
+
+        try:
+            parsed = list(parse_session_file(temp_path))
+            assert [msg.uuid for msg, _ in parsed] == ["1"]
+            end_pos = parsed[-1][1]
+            assert end_pos == len(complete.encode())
+
+            # Once the writer finishes the line, it is picked up from the saved position
+            with open(temp_path, 'a') as f:
+                f.write(partial[20:] + '\n')
+            parsed = list(parse_session_file(temp_path, end_pos))
+            assert [msg.uuid for msg, _ in parsed] == ["2"]
+        finally:
+            temp_path.unlink()
+
+    def test_lines_spanning_read_chunks(self, monkeypatch):
+        monkeypatch.setattr(parser, 'READ_CHUNK_SIZE', 16)
+        monkeypatch.setattr(parser._read_buffers, 'free', None)
+        messages = [
+            {"uuid": str(i), "type": "user", "content": "word " * i, "timestamp": "2024-01-15T10:30:00"}
+            for i in range(1, 20)
+        ]
+
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.jsonl', delete=False) as f:
+            for msg in messages:
+                f.write(json.dumps(msg) + '\n')
+            temp_path = Path(f.name)
+
+        try:
+            parsed = list(parse_session_file(temp_path))
+            assert [msg.content for msg, _ in parsed] == [m["content"] for m in messages]
+            assert parsed[-1][1] == temp_path.stat().st_size
+        finally:
+            temp_path.unlink()
+
 
 class TestGetSessionIdFromPath:
     """Tests for get_session_id_from_path function."""
@@ -1,15 +1,16 @@
 """Tests for the summarizer module."""
 
+import asyncio
 import tempfile
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
 from claude_activity.config import Config, DatabaseConfig, WatcherConfig, SummarizerConfig
 from claude_activity.db import Database
-from claude_activity.summarizer import Summarizer
+from claude_activity.summarizer import Summarizer, WEEKLY_SUMMARY_PROMPT, _WEEKLY_TEMPLATE
 
 
 @pytest.fixture
@@ -28,7 +29,8 @@ def temp_db():
 @pytest.fixture
 def mock_anthropic():
     """Mock the Anthropic client."""
-    with patch('claude_activity.summarizer.Anthropic') as mock:
+    with patch('claude_activity.summarizer.Anthropic') as mock, \
+            patch('claude_activity.summarizer._shared_client', None):
         client_instance = Mock()
         mock.return_value = client_instance
 
@@ -72,6 +74,38 @@ class TestSummarizer:
         assert "..." in result
         assert len(result) < 500  # Should be truncated to ~300 chars
 
+    def test_format_messages_stops_at_total_limit(self, temp_db, mock_anthropic):
+        db, config = temp_db
+        summarizer = Summarizer(config, db)
+
+        messages = [
+            {'role': 'user', 'content': 'a' * 200, 'project_name': 'first'},
+            {'role': 'user', 'content': 'b' * 200, 'project_name': 'first'},
+            {'role': 'user', 'content': 'c' * 200, 'project_name': 'second'},
+        ]
+
+        result = summarizer._format_messages_for_summary(messages, max_total_chars=300)
+        assert "... (truncated due to length)" in result
+        # Once the budget is spent, later projects are not listed at all
+        assert "## Project: second" not in result
+
+    def test_format_messages_collapses_repeats(self, temp_db, mock_anthropic):
+        db, config = temp_db
+        summarizer = Summarizer(config, db)
+
+        messages = [
+            {'role': 'user', 'content': 'continue', 'project_name': 'test'},
+            {'role': 'user', 'content': 'Fix the parser', 'project_name': 'test'},
+            {'role': 'user', 'content': 'continue', 'project_name': 'test'},
+        ]
+
+        result = summarizer._format_messages_for_summary(messages)
+        assert "(3 requests, 0 responses)" in result
+        assert result.count("- continue") == 1
+        assert "- continue  (×2)" in result
+        # The collapsed line keeps the position of the first occurrence
+        assert result.index("- continue") < result.index("- Fix the parser")
+
     def test_format_empty_messages(self, temp_db, mock_anthropic):
         db, config = temp_db
         summarizer = Summarizer(config, db)
@@ -136,6 +170,46 @@ class TestSummarizer:
         mock_anthropic.messages.create.assert_called_once()
         assert "Accomplishments" in summary
 
+    def test_daily_summary_skips_unchanged_input(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        project_id = db.get_or_create_project("/path/repo", "repo")
+        session_db_id = db.get_or_create_session("uuid-123", project_id)
+
+        yesterday = date.today() - timedelta(days=1)
+        timestamp = datetime.combine(yesterday, datetime.min.time().replace(hour=10))
+        db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, timestamp)
+
+        summarizer = Summarizer(config, db)
+        summarizer.generate_daily_summary(yesterday)
+        summarizer.generate_daily_summary(yesterday)
+        mock_anthropic.messages.create.assert_called_once()
+
+        # New activity changes the prompt, so the summary is regenerated
+        db.insert_message(session_db_id, "msg-2", "user", "user", "Another request", None, timestamp)
+        summarizer.generate_daily_summary(yesterday)
+        assert mock_anthropic.messages.create.call_count == 2
+
+        # So does switching to another model
+        config.summarizer.model = "another-model"
+        summarizer.generate_daily_summary(yesterday)
+        assert mock_anthropic.messages.create.call_count == 3
+
+    def test_daily_summary_force_ignores_unchanged_input(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        project_id = db.get_or_create_project("/path/repo", "repo")
+        session_db_id = db.get_or_create_session("uuid-123", project_id)
+
+        yesterday = date.today() - timedelta(days=1)
+        timestamp = datetime.combine(yesterday, datetime.min.time().replace(hour=10))
+        db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, timestamp)
+
+        summarizer = Summarizer(config, db)
+        summarizer.generate_daily_summary(yesterday)
+        summarizer.generate_daily_summary(yesterday, force=True)
+        assert mock_anthropic.messages.create.call_count == 2
+
     def test_generate_weekly_summary(self, temp_db, mock_anthropic):
         db, config = temp_db
 
@@ -154,6 +228,63 @@ class TestSummarizer:
         assert summary is not None
         mock_anthropic.messages.create.assert_called()
 
+    def test_weekly_summary_skips_unchanged_input(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        today = date.today()
+        last_monday = today - timedelta(days=today.weekday() + 7)
+        db.save_summary('daily', last_monday, last_monday, "Day 0 summary")
+
+        summarizer = Summarizer(config, db)
+        summarizer.generate_weekly_summary(last_monday)
+        summarizer.generate_weekly_summary(last_monday)
+        mock_anthropic.messages.create.assert_called_once()
+
+        # A changed daily summary changes the prompt
+        db.save_summary('daily', last_monday, last_monday, "Day 0 summary, revised")
+        summarizer.generate_weekly_summary(last_monday)
+        assert mock_anthropic.messages.create.call_count == 2
+
+        # Forced runs regenerate even when nothing changed
+        summarizer.generate_weekly_summary(last_monday, force=True)
+        assert mock_anthropic.messages.create.call_count == 3
+
+    def test_monthly_summary_skips_unchanged_input(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        month_start = date(2024, 3, 1)
+        week = date(2024, 3, 4)
+        db.save_summary('weekly', week, week + timedelta(days=6), "Week summary")
+
+        summarizer = Summarizer(config, db)
+        summarizer.generate_monthly_summary(2024, 3)
+        summarizer.generate_monthly_summary(2024, 3)
+        mock_anthropic.messages.create.assert_called_once()
+
+        summarizer.generate_monthly_summary(2024, 3, force=True)
+        assert mock_anthropic.messages.create.call_count == 2
+        assert db.get_summary('monthly', month_start) is not None
+
+    def test_weekly_summary_generates_missing_days(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        today = date.today()
+        last_monday = today - timedelta(days=today.weekday() + 7)
+
+        project_id = db.get_or_create_project("/path/repo", "repo")
+        session_db_id = db.get_or_create_session("uuid-123", project_id)
+        timestamp = datetime.combine(last_monday, datetime.min.time().replace(hour=10))
+        db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, timestamp)
+
+        summarizer = Summarizer(config, db)
+        summary = summarizer.generate_weekly_summary(last_monday)
+
+        assert summary is not None
+        # One daily summary for the day with activity, then the weekly one
+        assert mock_anthropic.messages.create.call_count == 2
+        weekly_prompt = mock_anthropic.messages.create.call_args.kwargs['messages'][0]['content']
+        assert f"### {last_monday}" in weekly_prompt
+
     def test_summarize_unsummarized(self, temp_db, mock_anthropic):
         db, config = temp_db
 
@@ -170,6 +301,78 @@ class TestSummarizer:
 
         assert results['daily'] >= 1
 
+    def test_summarize_unsummarized_streaming(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        project_id = db.get_or_create_project("/path/repo", "repo")
+        session_db_id = db.get_or_create_session("uuid-123", project_id)
+        days = [date.today() - timedelta(days=n) for n in (2, 3)]
+        for i, day in enumerate(days):
+            timestamp = datetime.combine(day, datetime.min.time().replace(hour=10))
+            db.insert_message(session_db_id, f"msg-{i}", "user", "user", "Hello", None, timestamp)
+
+        with patch('claude_activity.summarizer.AsyncAnthropic') as mock_async:
+            client = mock_async.return_value
+            client.close = AsyncMock()
+            stream = MagicMock()
+            stream.__aenter__.return_value.get_final_text = AsyncMock(return_value="Streamed summary")
+            client.messages.stream.return_value = stream
+
+            summarizer = Summarizer(config, db)
+            results = summarizer.summarize_unsummarized(concurrency=4)
+
+        assert results['daily'] == 2
+        assert client.messages.stream.call_count == 2
+        for day in days:
+            assert db.get_summary('daily', day)['summary'] == "Streamed summary"
+
+    def test_streaming_force_ignores_unchanged_input(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        project_id = db.get_or_create_project("/path/repo", "repo")
+        session_db_id = db.get_or_create_session("uuid-123", project_id)
+        day = date.today() - timedelta(days=2)
+        timestamp = datetime.combine(day, datetime.min.time().replace(hour=10))
+        db.insert_message(session_db_id, "msg-1", "user", "user", "Hello", None, timestamp)
+
+        summarizer = Summarizer(config, db)
+        summarizer.generate_daily_summary(day)
+        messages_by_day = db.get_messages_bucketed_by_date(day, day)
+
+        with patch('claude_activity.summarizer.AsyncAnthropic') as mock_async:
+            client = mock_async.return_value
+            client.close = AsyncMock()
+            stream = MagicMock()
+            stream.__aenter__.return_value.get_final_text = AsyncMock(return_value="Streamed summary")
+            client.messages.stream.return_value = stream
+
+            # Unchanged input is skipped unless forced
+            for force in (False, True):
+                count = asyncio.run(summarizer._generate_daily_summaries_streaming(
+                    [day], None, force, messages_by_day, concurrency=2
+                ))
+                assert count == 1
+
+        assert client.messages.stream.call_count == 1
+        assert db.get_summary('daily', day)['summary'] == "Streamed summary"
+
+    def test_session_context_uses_cache(self, temp_db, mock_anthropic):
+        db, config = temp_db
+
+        project_id = db.get_or_create_project("/path/repo", "repo")
+        session_db_id = db.get_or_create_session("uuid-123", project_id)
+        timestamp = datetime.now()
+        db.insert_message(session_db_id, "msg-1", "user", "user", "Add a feature", None, timestamp)
+        db.insert_message(session_db_id, "msg-2", "assistant", "assistant", "Done", "claude", timestamp)
+
+        summarizer = Summarizer(config, db)
+        first = summarizer.generate_session_context("uuid-123")
+        second = summarizer.generate_session_context("uuid-123")
+
+        assert first == second
+        # Unchanged conversation should not hit the API again
+        mock_anthropic.messages.create.assert_called_once()
+
 
 class TestPromptFormatting:
     """Tests for prompt formatting."""
@@ -193,3 +396,11 @@ class TestPromptFormatting:
 
         assert yesterday.strftime("%Y-%m-%d") in prompt
         assert "Test message" in prompt
+
+    def test_prompt_template_matches_format(self):
+        fields = {
+            'start_date': '2024-01-15',
+            'end_date': '2024-01-21',
+            'daily_summaries': 'Used {braces} in a summary',
+        }
+        assert _WEEKLY_TEMPLATE.render(**fields) == WEEKLY_SUMMARY_PROMPT.format(**fields)
@@ -0,0 +1,26 @@
+"""Tests for timestamp formatting helpers."""
+
+from datetime import datetime
+
+from claude_activity.timestamps import format_local_time, format_local_time_many
+
+
+class TestFormatLocalTimeMany:
+    """Tests for format_local_time_many function."""
+
+    def test_matches_format_local_time(self):
+        dts = [
+            datetime(2024, 1, 15, 10, 30, 0),
+            None,
+            datetime(2024, 7, 1, 23, 59, 59),
+            None,
+        ]
+        assert format_local_time_many(dts) == [format_local_time(dt) for dt in dts]
+
+    def test_custom_format(self):
+        dts = [datetime(2024, 1, 15, 10, 30, 0), None]
+        fmt = "%Y-%m-%d %H:%M"
+        assert format_local_time_many(dts, fmt) == [format_local_time(dt, fmt) for dt in dts]
+
+    def test_empty_list(self):
+        assert format_local_time_many([]) == []
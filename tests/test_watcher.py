@@ -0,0 +1,196 @@
+"""Tests for the file watcher."""
+
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from claude_activity import watcher
+from claude_activity.config import Config, DatabaseConfig, WatcherConfig, SummarizerConfig
+from claude_activity.db import Database
+from claude_activity.watcher import SessionFileHandler, _Debouncer
+
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database and a projects directory for session files."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = Config(
+            database=DatabaseConfig(path=Path(tmpdir) / "test.db"),
+            watcher=WatcherConfig(),
+            summarizer=SummarizerConfig()
+        )
+        db = Database(config)
+        yield db, config, Path(tmpdir) / "projects"
+
+
+def write_session_file(path: Path, count: int, cwd: str = None):
+    """Write a session file with count alternating user/assistant messages."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('w') as f:
+        for i in range(count):
+            role = "user" if i % 2 == 0 else "assistant"
+            data = {
+                "type": role,
+                "uuid": f"msg-{i}",
+                "timestamp": f"2024-01-15T10:{i // 60 % 60:02d}:{i % 60:02d}Z",
+                "message": {"role": role, "content": f"Message {i}"},
+            }
+            if cwd:
+                data["cwd"] = cwd
+            f.write(json.dumps(data) + "\n")
+
+
+class TestDebouncer:
+    """Tests for _Debouncer class."""
+
+    def test_burst_gives_one_callback(self):
+        calls = []
+        debouncer = _Debouncer(calls.append, delay=0.1)
+        try:
+            for _ in range(5):
+                debouncer.schedule("/path/session.jsonl")
+                time.sleep(0.01)
+            time.sleep(0.3)
+        finally:
+            debouncer.stop()
+
+        assert calls == ["/path/session.jsonl"]
+
+    def test_deadline_not_pushed_back(self):
+        calls = []
+        debouncer = _Debouncer(lambda path_str: calls.append(time.monotonic()), delay=0.1)
+        try:
+            start = time.monotonic()
+            # Keep writing past the first deadline
+            while time.monotonic() - start < 0.25:
+                debouncer.schedule("/path/session.jsonl")
+                time.sleep(0.01)
+        finally:
+            debouncer.stop()
+
+        assert calls
+        assert calls[0] - start < 0.2
+
+    def test_stop_prevents_callbacks(self):
+        calls = []
+        debouncer = _Debouncer(calls.append, delay=0.05)
+        debouncer.schedule("/path/a.jsonl")
+        debouncer.stop()
+        debouncer.schedule("/path/b.jsonl")
+        time.sleep(0.15)
+
+        assert calls == []
+
+    def test_stop_waits_for_callback(self):
+        started, finished = threading.Event(), threading.Event()
+
+        def callback(path_str):
+            started.set()
+            time.sleep(0.1)
+            finished.set()
+
+        debouncer = _Debouncer(callback, delay=0.01)
+        debouncer.schedule("/path/session.jsonl")
+        assert started.wait(5)
+        debouncer.stop()
+
+        assert finished.is_set()
+
+
+class TestSessionFileHandler:
+    """Tests for SessionFileHandler."""
+
+    def test_event_during_processing_reruns(self, temp_db):
+        db, config, _ = temp_db
+        handler = SessionFileHandler(db, config)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def do_process(file_path):
+            calls.append(file_path)
+            if len(calls) == 1:
+                started.set()
+                release.wait(5)
+
+        handler._do_process = do_process
+        path = Path("/path/session.jsonl")
+        first = threading.Thread(target=handler._process_file, args=(path,))
+        first.start()
+        assert started.wait(5)
+
+        # A second event while the first pass runs is picked up by that thread
+        handler._process_file(path)
+        assert len(calls) == 1
+        release.set()
+        first.join(timeout=5)
+
+        assert calls == [path, path]
+
+    def test_file_larger_than_batch(self, temp_db, monkeypatch):
+        db, config, projects = temp_db
+        monkeypatch.setattr(watcher, 'WRITE_BATCH_SIZE', 10)
+        path = projects / "-tmp-repo" / "session-1.jsonl"
+        write_session_file(path, 25, cwd="/tmp/repo")
+
+        handler = SessionFileHandler(db, config)
+        handler._do_process(path)
+
+        session = db.get_session("session-1")
+        assert session['message_count'] == 25
+        assert db.get_last_position(str(path)) == path.stat().st_size
+
+        # Appended messages are read from the recorded position
+        with path.open('a') as f:
+            f.write(json.dumps({
+                "type": "user", "uuid": "msg-25", "timestamp": "2024-01-15T11:00:00Z",
+                "cwd": "/tmp/repo", "message": {"role": "user", "content": "More"},
+            }) + "\n")
+        handler._do_process(path)
+
+        assert db.get_session("session-1")['message_count'] == 26
+        assert db.get_last_position(str(path)) == path.stat().st_size
+
+    def test_git_branch_after_first_batch(self, temp_db, monkeypatch):
+        db, config, projects = temp_db
+        monkeypatch.setattr(watcher, 'WRITE_BATCH_SIZE', 10)
+        path = projects / "-tmp-repo" / "session-1.jsonl"
+        write_session_file(path, 25, cwd="/tmp/repo")
+        lines = path.read_text().splitlines()
+        late = json.loads(lines[20])
+        late["gitBranch"] = "feature"
+        lines[20] = json.dumps(late)
+        path.write_text("\n".join(lines) + "\n")
+
+        SessionFileHandler(db, config)._do_process(path)
+
+        assert db.get_session("session-1")['git_branch'] == "feature"
+
+    def test_project_path_fallback(self, temp_db, monkeypatch):
+        db, config, projects = temp_db
+        monkeypatch.setattr(watcher, 'WRITE_BATCH_SIZE', 10)
+        path = projects / "-tmp-repo" / "session-1.jsonl"
+        write_session_file(path, 15)
+
+        SessionFileHandler(db, config)._do_process(path)
+
+        session = db.get_session("session-1")
+        assert session['message_count'] == 15
+        projects_by_id = {p['id']: p['path'] for p in db.list_projects()}
+        assert projects_by_id[session['project_id']] == "/tmp/repo"
+        assert db.get_last_position(str(path)) == path.stat().st_size
+
+    def test_remembered_stats_are_capped(self, temp_db, monkeypatch):
+        db, config, projects = temp_db
+        monkeypatch.setattr(watcher, 'MAX_TRACKED_HASHES', 2)
+        handler = SessionFileHandler(db, config)
+        paths = [projects / "-tmp-repo" / f"session-{i}.jsonl" for i in range(3)]
+        for path in paths:
+            write_session_file(path, 2, cwd="/tmp/repo")
+            handler._do_process(path)
+
+        # The least recently processed file is forgotten first
+        assert list(handler._last_stat) == [str(paths[1]), str(paths[2])]